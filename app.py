@@ -19,10 +19,88 @@ Data de criação: 2024
 Versão: 1.0
 """
 
-from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
+import gzip
+from flask import Flask, current_app, g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
 from config import Config
-import os
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional; sem ele o jsonify usa o json padrão
+    orjson = None
+
+
+class _OrjsonProvider(DefaultJSONProvider):
+    """
+    Serialização JSON do Flask (jsonify, get_json) feita pelo orjson.
+    
+    Datas, Decimal e demais tipos não nativos continuam passando pelo
+    `default` do Flask, mantendo a mesma saída do provedor padrão.
+    """
+    
+    _OPCOES = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+               | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self._OPCOES).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+def _minusculas(valor):
+    """lower() com a regra Unicode do Python (o do SQLite só trata ASCII)"""
+    return valor.lower() if isinstance(valor, str) else valor
+
+
+def _configurar_sqlite(dbapi_connection, connection_record):
+    """Aplica os PRAGMAs de desempenho a cada nova conexão SQLite do pool"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.close()
+    # O lower nativo fica intocado (índices e consultas existentes dependem
+    # dele); a busca por nome usa unicode_lower para casar 'Érica' com 'érica'
+    dbapi_connection.create_function('unicode_lower', 1, _minusculas, deterministic=True)
+
+def _comprimir_resposta(response):
+    """Compacta com gzip as respostas textuais grandes quando o cliente aceita"""
+    if (response.direct_passthrough
+            or response.status_code < 200 or response.status_code >= 300
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in current_app.config['COMPRESS_MIMETYPES']
+            or 'gzip' not in request.headers.get('Accept-Encoding', '').lower()):
+        return response
+    
+    conteudo = response.get_data()
+    if len(conteudo) < current_app.config['COMPRESS_MIN_SIZE']:
+        return response
+    
+    response.set_data(gzip.compress(conteudo, compresslevel=current_app.config['COMPRESS_LEVEL']))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
+def _contar_consulta(conn, cursor, statement, parameters, context, executemany):
+    """Conta as consultas SQL executadas na requisição atual (modo debug)"""
+    # O modo debug só é conhecido ao rodar (app.run(debug=True)), não na factory
+    if has_request_context() and current_app.debug:
+        g._consultas_sql = g.get('_consultas_sql', 0) + 1
+
+
+def _alertar_excesso_consultas(response):
+    """Avisa no log quando a requisição passou do limite de consultas SQL (modo debug)"""
+    if not current_app.debug:
+        return response
+    consultas = g.get('_consultas_sql', 0)
+    limite = current_app.config['SQL_ALERTA_CONSULTAS_POR_REQUISICAO']
+    if consultas > limite:
+        current_app.logger.warning(
+            '%s %s executou %d consultas SQL (limite %d): possível N+1',
+            request.method, request.path, consultas, limite
+        )
+    return response
 
 def create_app():
     """
@@ -41,6 +119,7 @@ def create_app():
     - Configurações do banco de dados SQLite
     - Inicialização das extensões (SQLAlchemy)
     - Registro dos blueprints de rotas
+    - Compressão gzip das respostas grandes
     - Criação automática das tabelas do banco
     """
     # Criação da instância Flask com pastas customizadas
@@ -51,17 +130,42 @@ def create_app():
     # Carregamento das configurações específicas do SINT-IFESGO
     app.config.from_object(Config)
     
+    # JSON das APIs serializado pelo orjson, quando instalado
+    if orjson is not None:
+        app.json = _OrjsonProvider(app)
+    
     # Inicialização das extensões do Flask
     from app.models import db
     db.init_app(app)  # SQLAlchemy para ORM do banco de dados
     
+    # SQLite: modo WAL permite leituras concorrentes durante escritas
+    if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        with app.app_context():
+            event.listen(db.engine, 'connect', _configurar_sqlite)
+    
+    # Desenvolvimento: detectar consultas em excesso (N+1) por requisição.
+    # Registrado sempre; os próprios ganchos só agem com o modo debug ativo
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _contar_consulta)
+    app.after_request(_alertar_excesso_consultas)
+    
     # Registro dos blueprints (rotas organizadas)
     from app.routes import routes
     app.register_blueprint(routes)
     
+    # Compressão gzip das respostas JSON/HTML (ver COMPRESS_* em config.py)
+    app.after_request(_comprimir_resposta)
+    
     # Criação automática das tabelas do banco de dados
     with app.app_context():
         db.create_all()
+        # create_all não altera tabelas existentes (não há ferramenta de
+        # migração): primeiro as colunas/dados novos, depois os índices novos
+        from app.esquema import atualizar_esquema
+        atualizar_esquema(db.engine)
+        for tabela in db.metadata.sorted_tables:
+            for indice in tabela.indexes:
+                indice.create(bind=db.engine, checkfirst=True)
         print("Banco de dados criado com sucesso!")
         print(f"Local do banco: {app.config['SQLALCHEMY_DATABASE_URI']}")
     
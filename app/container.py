@@ -11,11 +11,30 @@ from config import Config
 
 
 class DependencyContainer:
-    """Container para gerenciar todas as dependências da aplicação"""
+    """
+    Container para gerenciar todas as dependências da aplicação.
+    
+    As instâncias são criadas uma única vez no construtor e os serviços são
+    resolvidos apenas na importação de app/routes.py; os métodos get_* apenas
+    retornam atributos já prontos, sem custo relevante por requisição.
+    """
     
     def __init__(self):
         self._config = Config()
-        self._instances = {}
+        self._registrar_instancias()
+    
+    def _registrar_instancias(self):
+        """Cria todas as instâncias de uma vez, evitando inicialização concorrente por requisição"""
+        self._reserva_validator = ValidadorReserva(self._config)
+        self._reserva_repository = ReservaRepository()
+        self._associado_service = AssociadoService()
+        self._taxa_service = TaxaService(self._config)
+        # ReservaService reutiliza as mesmas instâncias dos demais serviços
+        self._reserva_service = ReservaService(
+            self._reserva_repository, self._reserva_validator,
+            self._associado_service, self._taxa_service
+        )
+        self._boletim_service = BoletimService()
     
     def get_config(self) -> Config:
         """Retorna a configuração da aplicação"""
@@ -23,45 +42,31 @@ class DependencyContainer:
     
     def get_reserva_validator(self) -> IValidadorReserva:
         """Retorna o validador de reservas"""
-        if 'reserva_validator' not in self._instances:
-            self._instances['reserva_validator'] = ValidadorReserva(self._config)
-        return self._instances['reserva_validator']
+        return self._reserva_validator
     
     def get_reserva_repository(self) -> IReservaRepository:
         """Retorna o repositório de reservas"""
-        if 'reserva_repository' not in self._instances:
-            self._instances['reserva_repository'] = ReservaRepository()
-        return self._instances['reserva_repository']
+        return self._reserva_repository
     
     def get_reserva_service(self) -> ReservaService:
         """Retorna o serviço de reservas com todas as dependências injetadas"""
-        if 'reserva_service' not in self._instances:
-            repository = self.get_reserva_repository()
-            validator = self.get_reserva_validator()
-            self._instances['reserva_service'] = ReservaService(repository, validator)
-        return self._instances['reserva_service']
+        return self._reserva_service
     
     def get_associado_service(self) -> AssociadoService:
         """Retorna o serviço de associados"""
-        if 'associado_service' not in self._instances:
-            self._instances['associado_service'] = AssociadoService()
-        return self._instances['associado_service']
+        return self._associado_service
     
     def get_taxa_service(self) -> TaxaService:
         """Retorna o serviço de taxas"""
-        if 'taxa_service' not in self._instances:
-            self._instances['taxa_service'] = TaxaService()
-        return self._instances['taxa_service']
+        return self._taxa_service
     
     def get_boletim_service(self) -> BoletimService:
         """Retorna o serviço de boletins"""
-        if 'boletim_service' not in self._instances:
-            self._instances['boletim_service'] = BoletimService()
-        return self._instances['boletim_service']
+        return self._boletim_service
     
     def clear_instances(self):
-        """Limpa todas as instâncias (útil para testes)"""
-        self._instances.clear()
+        """Recria todas as instâncias (útil para testes)"""
+        self._registrar_instancias()
 
 
 # Instância global do container (singleton)
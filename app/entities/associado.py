@@ -1,11 +1,108 @@
-from dataclasses import dataclass
+import sys
+from dataclasses import dataclass, field
 from datetime import datetime, date
-from typing import Optional
+from functools import lru_cache
+from operator import mul
+from typing import Iterable, Optional
 import re
+from app.entities.formatacao import formatar_data, formatar_data_hora
+from app.entities.memorizacao import DictMemorizado
 
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional; sem ele o lote usa o validador unitário
+    np = None
 
-@dataclass
-class Associado:
+
+# Padrão pré-compilado para remover a formatação do CPF
+_CPF_CLEAN_RE = re.compile(r'[^\d]')
+
+# CPFs com todos os dígitos iguais são inválidos
+_CPF_INVALIDOS = frozenset(str(d) * 11 for d in range(10))
+
+# Converte os caracteres ASCII '0'-'9' nos valores 0-9
+_ASCII_PARA_DIGITO = bytes.maketrans(b'0123456789', bytes(range(10)))
+
+# Pesos dos dígitos verificadores
+_PESOS_DIGITO1 = (10, 9, 8, 7, 6, 5, 4, 3, 2)
+_PESOS_DIGITO2 = (11, 10, 9, 8, 7, 6, 5, 4, 3, 2)
+
+# Mesmos pesos como vetores NumPy, montados uma única vez para o lote
+if np is not None:
+    _PESOS_DIGITO1_NP = np.array(_PESOS_DIGITO1, dtype=np.int32)
+    _PESOS_DIGITO2_NP = np.array(_PESOS_DIGITO2, dtype=np.int32)
+
+
+@lru_cache(maxsize=4096)
+def _validar_cpf(cpf: str) -> tuple[bool, str]:
+    """Valida CPF usando algoritmo oficial (resultado memorizado por CPF)"""
+    cpf = _CPF_CLEAN_RE.sub('', cpf)
+    
+    if len(cpf) != 11:
+        return False, "CPF deve ter 11 dígitos"
+    
+    # CPFs inválidos conhecidos
+    if cpf in _CPF_INVALIDOS or not cpf.isascii():
+        return False, "CPF inválido"
+    
+    digitos = cpf.encode().translate(_ASCII_PARA_DIGITO)
+    
+    # Validação do primeiro dígito
+    resto = sum(map(mul, digitos, _PESOS_DIGITO1)) % 11
+    digito1 = 0 if resto < 2 else 11 - resto
+    
+    if digitos[9] != digito1:
+        return False, "CPF inválido"
+    
+    # Validação do segundo dígito
+    resto = sum(map(mul, digitos, _PESOS_DIGITO2)) % 11
+    digito2 = 0 if resto < 2 else 11 - resto
+    
+    if digitos[10] != digito2:
+        return False, "CPF inválido"
+    
+    return True, "CPF válido"
+
+
+def validar_cpfs_em_lote(cpfs: Iterable[str]) -> list[bool]:
+    """
+    Valida vários CPFs de uma vez (ex.: importação de associados).
+    
+    Com NumPy os dígitos verificadores são calculados para todo o lote com
+    dois produtos matriz-vetor; o resultado é igual ao de _validar_cpf.
+    """
+    limpos = [_CPF_CLEAN_RE.sub('', cpf) for cpf in cpfs]
+    if np is None:
+        return [_validar_cpf(cpf)[0] for cpf in limpos]
+    
+    validos = [False] * len(limpos)
+    
+    # Apenas CPFs com 11 dígitos ASCII entram na matriz; os demais são inválidos
+    indices = [i for i, cpf in enumerate(limpos) if len(cpf) == 11 and cpf.isascii()]
+    if not indices:
+        return validos
+    
+    bloco = ''.join([limpos[i] for i in indices]).encode()
+    digitos = np.frombuffer(bloco, dtype=np.uint8).reshape(-1, 11).astype(np.int32) - 48
+    
+    resto = digitos[:, :9] @ _PESOS_DIGITO1_NP % 11
+    digito1 = np.where(resto < 2, 0, 11 - resto)
+    
+    resto = digitos[:, :10] @ _PESOS_DIGITO2_NP % 11
+    digito2 = np.where(resto < 2, 0, 11 - resto)
+    
+    # CPFs com todos os dígitos iguais são inválidos
+    repetidos = (digitos == digitos[:, :1]).all(axis=1)
+    
+    mascara = (digitos[:, 9] == digito1) & (digitos[:, 10] == digito2) & ~repetidos
+    for i, valido in zip(indices, mascara.tolist()):
+        validos[i] = valido
+    
+    return validos
+
+
+@dataclass(slots=True)
+class Associado(DictMemorizado):
     """Entidade de domínio para Associado do SINT-IFESGO"""
     
     cpf: str
@@ -14,21 +111,20 @@ class Associado:
     telefone: str
     status_adimplencia: str = 'adimplente'  # adimplente, inadimplente
     data_ultimo_pagamento: Optional[date] = None
-    data_cadastro: Optional[datetime] = None
+    data_cadastro: Optional[datetime] = field(default_factory=datetime.utcnow)
     ativo: bool = True
     id: Optional[int] = None
     
     def __post_init__(self):
         """Inicialização pós-criação"""
-        if self.data_cadastro is None:
-            self.data_cadastro = datetime.utcnow()
-        
         # Limpar e validar CPF
         self.cpf = self._limpar_cpf(self.cpf)
+        # Status internado: comparações com os literais resolvem por identidade
+        self.status_adimplencia = sys.intern(self.status_adimplencia)
     
     def _limpar_cpf(self, cpf: str) -> str:
         """Remove formatação do CPF"""
-        return re.sub(r'[^\d]', '', cpf)
+        return _CPF_CLEAN_RE.sub('', cpf)
     
     def cpf_formatado(self) -> str:
         """Retorna CPF formatado"""
@@ -44,7 +140,8 @@ class Associado:
         if not self.ativo:
             return False, "Associado inativo no sistema"
         
-        if not self.is_adimplente():
+        # ativo já verificado acima; basta checar a situação sindical
+        if self.status_adimplencia != 'adimplente':
             return False, "Associado inadimplente com taxa sindical. Regularize sua situação para fazer reservas."
         
         return True, "Associado pode fazer reserva"
@@ -61,38 +158,14 @@ class Associado:
     @staticmethod
     def validar_cpf(cpf: str) -> tuple[bool, str]:
         """Valida CPF usando algoritmo oficial"""
-        cpf = re.sub(r'[^\d]', '', cpf)
-        
-        if len(cpf) != 11:
-            return False, "CPF deve ter 11 dígitos"
-        
-        # CPFs inválidos conhecidos
-        if cpf in ['00000000000', '11111111111', '22222222222', 
-                   '33333333333', '44444444444', '55555555555',
-                   '66666666666', '77777777777', '88888888888',
-                   '99999999999']:
-            return False, "CPF inválido"
-        
-        # Validação do primeiro dígito
-        soma = sum(int(cpf[i]) * (10 - i) for i in range(9))
-        resto = soma % 11
-        digito1 = 0 if resto < 2 else 11 - resto
-        
-        if int(cpf[9]) != digito1:
-            return False, "CPF inválido"
-        
-        # Validação do segundo dígito
-        soma = sum(int(cpf[i]) * (11 - i) for i in range(10))
-        resto = soma % 11
-        digito2 = 0 if resto < 2 else 11 - resto
-        
-        if int(cpf[10]) != digito2:
-            return False, "CPF inválido"
-        
-        return True, "CPF válido"
+        return _validar_cpf(cpf)
     
     def to_dict(self) -> dict:
-        """Converte para dicionário"""
+        """Converte para dicionário (memorizado até a próxima atribuição; devolve uma cópia)"""
+        return dict(self._dict_memorizado())
+    
+    def _montar_dict(self) -> dict:
+        """Monta o dicionário de serialização"""
         return {
             'id': self.id,
             'cpf': self.cpf,
@@ -102,8 +175,8 @@ class Associado:
             'telefone': self.telefone,
             'status_adimplencia': self.status_adimplencia,
             'status_display': 'Adimplente' if self.status_adimplencia == 'adimplente' else 'Inadimplente',
-            'data_ultimo_pagamento': self.data_ultimo_pagamento.strftime('%d/%m/%Y') if self.data_ultimo_pagamento else 'Nunca',
-            'data_cadastro': self.data_cadastro.strftime('%d/%m/%Y %H:%M') if self.data_cadastro else '',
+            'data_ultimo_pagamento': formatar_data(self.data_ultimo_pagamento) if self.data_ultimo_pagamento else 'Nunca',
+            'data_cadastro': formatar_data_hora(self.data_cadastro) if self.data_cadastro else '',
             'ativo': self.ativo,
-            'pode_reservar': self.is_adimplente() and self.ativo
+            'pode_reservar': self.is_adimplente()
         }
\ No newline at end of file
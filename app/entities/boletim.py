@@ -1,17 +1,22 @@
-from dataclasses import dataclass
+import sys
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional, List
+from app.entities.formatacao import formatar_data_hora
+from app.entities.memorizacao import DictMemorizado
 
+_PRIORIDADES_URGENTES = frozenset(('alta', 'critica'))
 
-@dataclass
-class Boletim:
+
+@dataclass(slots=True)
+class Boletim(DictMemorizado):
     """Entidade de domínio para Boletim Informativo"""
     
     titulo: str
     conteudo: str
     tipo: str = 'geral'  # geral, urgente, comunicado, evento
     prioridade: str = 'normal'  # baixa, normal, alta, critica
-    data_publicacao: Optional[datetime] = None
+    data_publicacao: Optional[datetime] = field(default_factory=datetime.utcnow)
     data_expiracao: Optional[datetime] = None
     ativo: bool = True
     autor: Optional[str] = None
@@ -20,23 +25,30 @@ class Boletim:
     
     def __post_init__(self):
         """Inicialização pós-criação"""
-        if self.data_publicacao is None:
-            self.data_publicacao = datetime.utcnow()
+        # Campos enumerados internados: comparações resolvem por identidade
+        self.tipo = sys.intern(self.tipo)
+        self.prioridade = sys.intern(self.prioridade)
+        self.destinatarios = sys.intern(self.destinatarios)
     
-    def is_ativo(self) -> bool:
-        """Verifica se o boletim está ativo"""
+    def is_ativo(self, agora: Optional[datetime] = None) -> bool:
+        """
+        Verifica se o boletim está ativo.
+        
+        Listagens podem passar `agora` para amostrar o relógio uma única vez
+        para todos os boletins.
+        """
         if not self.ativo:
             return False
         
         # Verifica se não expirou
-        if self.data_expiracao and datetime.utcnow() > self.data_expiracao:
+        if self.data_expiracao and (agora or datetime.utcnow()) > self.data_expiracao:
             return False
         
         return True
     
     def is_urgente(self) -> bool:
         """Verifica se é boletim urgente"""
-        return self.prioridade in ['alta', 'critica'] or self.tipo == 'urgente'
+        return self.prioridade in _PRIORIDADES_URGENTES or self.tipo == 'urgente'
     
     def deve_notificar_associado(self, status_adimplencia: str) -> bool:
         """Verifica se deve notificar associado baseado no status"""
@@ -58,8 +70,17 @@ class Boletim:
         
         return self.conteudo[:max_chars] + "..."
     
-    def to_dict(self) -> dict:
-        """Converte para dicionário"""
+    def to_dict(self, agora: Optional[datetime] = None) -> dict:
+        """
+        Converte para dicionário.
+        
+        Os campos derivados fixos (resumo, urgência, classe CSS) são memorizados;
+        apenas `is_ativo`, que depende do relógio, é recalculado a cada chamada.
+        """
+        return {**self._dict_memorizado(), 'is_ativo': self.is_ativo(agora)}
+    
+    def _montar_dict(self) -> dict:
+        """Monta o dicionário de serialização"""
         return {
             'id': self.id,
             'titulo': self.titulo,
@@ -67,10 +88,9 @@ class Boletim:
             'resumo': self.resumo(),
             'tipo': self.tipo,
             'prioridade': self.prioridade,
-            'data_publicacao': self.data_publicacao.strftime('%d/%m/%Y %H:%M') if self.data_publicacao else '',
-            'data_expiracao': self.data_expiracao.strftime('%d/%m/%Y %H:%M') if self.data_expiracao else None,
+            'data_publicacao': formatar_data_hora(self.data_publicacao) if self.data_publicacao else '',
+            'data_expiracao': formatar_data_hora(self.data_expiracao) if self.data_expiracao else None,
             'ativo': self.ativo,
-            'is_ativo': self.is_ativo(),
             'is_urgente': self.is_urgente(),
             'autor': self.autor or 'SINT-IFESGO',
             'destinatarios': self.destinatarios,
@@ -0,0 +1,42 @@
+"""Formatação (e leitura) de datas e horários usados nas entidades e serviços"""
+
+from datetime import date, datetime, time
+
+
+def formatar_data(valor: date) -> str:
+    """Formata data como DD/MM/AAAA"""
+    return f"{valor.day:02d}/{valor.month:02d}/{valor.year}"
+
+
+def formatar_data_hora(valor: datetime) -> str:
+    """Formata data e hora como DD/MM/AAAA HH:MM"""
+    return f"{valor.day:02d}/{valor.month:02d}/{valor.year} {valor.hour:02d}:{valor.minute:02d}"
+
+
+def formatar_hora(valor: time) -> str:
+    """Formata horário como HH:MM"""
+    return f"{valor.hour:02d}:{valor.minute:02d}"
+
+
+# Leitura das entradas da API. O formato exato cai no fromisoformat (em C);
+# qualquer outra forma segue para o strptime, que aceita/rejeita como antes.
+
+def ler_data(texto: str) -> date:
+    """Lê data no formato AAAA-MM-DD"""
+    if len(texto) == 10 and texto[4] == '-' and texto[7] == '-':
+        return date.fromisoformat(texto)
+    return datetime.strptime(texto, '%Y-%m-%d').date()
+
+
+def ler_hora(texto: str) -> time:
+    """Lê horário no formato HH:MM"""
+    if len(texto) == 5 and texto[2] == ':':
+        return time.fromisoformat(texto)
+    return datetime.strptime(texto, '%H:%M').time()
+
+
+def ler_data_hora(texto: str) -> datetime:
+    """Lê data e hora no formato AAAA-MM-DD HH:MM"""
+    if len(texto) == 16 and texto[4] == '-' and texto[7] == '-' and texto[10] == ' ' and texto[13] == ':':
+        return datetime.fromisoformat(texto)
+    return datetime.strptime(texto, '%Y-%m-%d %H:%M')
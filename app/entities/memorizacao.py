@@ -0,0 +1,25 @@
+"""Memorização do dicionário de serialização das entidades"""
+
+
+class DictMemorizado:
+    """
+    Base das entidades que memorizam o resultado de `_montar_dict()`.
+
+    Qualquer atribuição a um atributo descarta o dicionário memorizado, que
+    é montado de novo na próxima chamada de `_dict_memorizado()`.
+    """
+
+    __slots__ = ('_dict_cache',)
+
+    def __setattr__(self, nome, valor):
+        """Atribuições a campos descartam o dicionário memorizado"""
+        object.__setattr__(self, nome, valor)
+        if nome != '_dict_cache':
+            object.__setattr__(self, '_dict_cache', None)
+
+    def _dict_memorizado(self) -> dict:
+        """Dicionário de `_montar_dict()` (não deve ser alterado por quem chama)"""
+        dicionario = getattr(self, '_dict_cache', None)
+        if dicionario is None:
+            dicionario = self._dict_cache = self._montar_dict()
+        return dicionario
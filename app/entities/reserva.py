@@ -1,10 +1,16 @@
-from dataclasses import dataclass
+import sys
+from dataclasses import dataclass, field
 from datetime import datetime, date, time
 from typing import Optional
+from app.entities.formatacao import formatar_data, formatar_data_hora, formatar_hora
+from app.entities.memorizacao import DictMemorizado
 
+# Antecedência mínima para cancelamento (24 horas, em segundos)
+_JANELA_CANCELAMENTO_S = 24 * 3600
 
-@dataclass
-class Reserva:
+
+@dataclass(slots=True)
+class Reserva(DictMemorizado):
     """Entidade de domínio para Reserva"""
     
     nome: str
@@ -18,18 +24,31 @@ class Reserva:
     observacoes: Optional[str] = None
     status: str = 'ativa'
     id: Optional[int] = None
-    data_criacao: Optional[datetime] = None
+    data_criacao: Optional[datetime] = field(default_factory=datetime.utcnow)
+    _duracao_min: int = field(default=0, init=False, repr=False, compare=False)
     
     def __post_init__(self):
         """Inicialização pós-criação"""
-        if self.data_criacao is None:
-            self.data_criacao = datetime.utcnow()
+        # Status internado: comparações com os literais resolvem por identidade
+        self.status = sys.intern(self.status)
+        # Duração em minutos inteiros; __setattr__ refaz se um horário for reatribuído
+        self._duracao_min = self._calcular_duracao_min()
+    
+    def __setattr__(self, nome, valor):
+        """Além de descartar o dicionário memorizado, recalcula a duração"""
+        # Classe nomeada: o super() sem argumentos falha em dataclass com slots
+        DictMemorizado.__setattr__(self, nome, valor)
+        if nome in ('horario_inicio', 'horario_fim') and hasattr(self, '_duracao_min'):
+            object.__setattr__(self, '_duracao_min', self._calcular_duracao_min())
+    
+    def _calcular_duracao_min(self) -> int:
+        """Duração da reserva em minutos inteiros"""
+        return (self.horario_fim.hour * 60 + self.horario_fim.minute
+                - self.horario_inicio.hour * 60 - self.horario_inicio.minute)
     
     def calcular_duracao_horas(self) -> float:
         """Calcula a duração da reserva em horas"""
-        inicio_total = self.horario_inicio.hour + self.horario_inicio.minute / 60
-        fim_total = self.horario_fim.hour + self.horario_fim.minute / 60
-        return fim_total - inicio_total
+        return self._duracao_min / 60.0
     
     def is_ativa(self) -> bool:
         """Verifica se a reserva está ativa"""
@@ -40,14 +59,15 @@ class Reserva:
         if not self.is_ativa():
             return False, "Reserva já foi cancelada"
         
-        agora = datetime.now()
-        data_hora_reserva = datetime.combine(self.data_reserva, self.horario_inicio)
+        # Segundos até o início da reserva (negativo se já começou)
+        segundos_ate_inicio = (
+            datetime.combine(self.data_reserva, self.horario_inicio) - datetime.now()
+        ).total_seconds()
         
-        if data_hora_reserva <= agora:
+        if segundos_ate_inicio <= 0:
             return False, "Não é possível cancelar reservas que já começaram"
         
-        diferenca = data_hora_reserva - agora
-        if diferenca.total_seconds() < 24 * 3600:  # 24 horas
+        if segundos_ate_inicio < _JANELA_CANCELAMENTO_S:
             return False, "Cancelamento deve ser feito com pelo menos 24h de antecedência"
         
         return True, "Reserva pode ser cancelada"
@@ -59,21 +79,25 @@ class Reserva:
             self.observacoes = (self.observacoes or '') + f"\nCancelada: {motivo}"
     
     def to_dict(self) -> dict:
-        """Converte para dicionário"""
+        """Converte para dicionário (memorizado até a próxima atribuição; devolve uma cópia)"""
+        return dict(self._dict_memorizado())
+    
+    def _montar_dict(self) -> dict:
+        """Monta o dicionário de serialização"""
         return {
             'id': self.id,
             'nome': self.nome,
             'email': self.email,
             'telefone': self.telefone,
 
-            'data_reserva': self.data_reserva.strftime('%d/%m/%Y'),
-            'data_reserva_iso': self.data_reserva.strftime('%Y-%m-%d'),
-            'horario_inicio': self.horario_inicio.strftime('%H:%M'),
-            'horario_fim': self.horario_fim.strftime('%H:%M'),
+            'data_reserva': formatar_data(self.data_reserva),
+            'data_reserva_iso': self.data_reserva.isoformat(),
+            'horario_inicio': formatar_hora(self.horario_inicio),
+            'horario_fim': formatar_hora(self.horario_fim),
             'numero_convidados': self.numero_convidados,
             'status': self.status,
             'status_display': 'Ativa' if self.status == 'ativa' else 'Cancelada',
-            'data_criacao': self.data_criacao.strftime('%d/%m/%Y %H:%M') if self.data_criacao else '',
+            'data_criacao': formatar_data_hora(self.data_criacao) if self.data_criacao else '',
             'observacoes': self.observacoes or '',
             'duracao_horas': self.calcular_duracao_horas()
         }
\ No newline at end of file
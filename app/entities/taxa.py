@@ -1,11 +1,22 @@
-from dataclasses import dataclass
+import secrets
+import sys
+from dataclasses import dataclass, field
 from datetime import datetime, date
 from typing import Optional
 from decimal import Decimal
+from app.entities.formatacao import formatar_data, formatar_data_hora
+from app.entities.memorizacao import DictMemorizado
 
+_STATUS_DISPLAY = {
+    'pendente': 'Pendente',
+    'pago': 'Pago',
+    'vencido': 'Vencido',
+    'cancelado': 'Cancelado'
+}
 
-@dataclass
-class Taxa:
+
+@dataclass(slots=True)
+class Taxa(DictMemorizado):
     """Entidade de domínio para Taxa de Reserva"""
     
     valor: Decimal
@@ -18,18 +29,29 @@ class Taxa:
     codigo_pagamento: Optional[str] = None
     observacoes: Optional[str] = None
     id: Optional[int] = None
-    data_criacao: Optional[datetime] = None
+    data_criacao: Optional[datetime] = field(default_factory=datetime.utcnow)
+    _valor_fmt: Optional[str] = field(default=None, init=False, repr=False, compare=False)
     
     def __post_init__(self):
         """Inicialização pós-criação"""
-        if self.data_criacao is None:
-            self.data_criacao = datetime.utcnow()
+        # Campos enumerados internados: comparações resolvem por identidade
+        self.status = sys.intern(self.status)
+        self.tipo = sys.intern(self.tipo)
+        # Formatado uma única vez; __setattr__ refaz se `valor` for reatribuído
+        self._valor_fmt = f"R$ {self.valor:.2f}".replace('.', ',')
         
         # Se não definiu vencimento e é taxa de reserva, define 24h
         if self.data_vencimento is None and self.tipo == 'reserva':
             self.data_vencimento = date.today()
             # Para reserva, vencimento é em 24h para confirmar pagamento
     
+    def __setattr__(self, nome, valor):
+        """Além de descartar o dicionário memorizado, reformata `valor` reatribuído"""
+        # Classe nomeada: o super() sem argumentos falha em dataclass com slots
+        DictMemorizado.__setattr__(self, nome, valor)
+        if nome == 'valor' and hasattr(self, '_valor_fmt'):
+            object.__setattr__(self, '_valor_fmt', f"R$ {valor:.2f}".replace('.', ','))
+    
     def is_pendente(self) -> bool:
         """Verifica se a taxa está pendente"""
         return self.status == 'pendente'
@@ -81,14 +103,12 @@ class Taxa:
     
     def gerar_codigo_pagamento(self) -> str:
         """Gera código único para pagamento"""
-        import uuid
-        codigo = str(uuid.uuid4())[:8].upper()
-        self.codigo_pagamento = f"SINT{codigo}"
+        self.codigo_pagamento = f"SINT{secrets.token_hex(4).upper()}"
         return self.codigo_pagamento
     
     def valor_formatado(self) -> str:
         """Retorna valor formatado em Real"""
-        return f"R$ {self.valor:.2f}".replace('.', ',')
+        return self._valor_fmt
     
     def dias_para_vencimento(self) -> int:
         """Retorna quantos dias faltam para vencimento"""
@@ -99,7 +119,22 @@ class Taxa:
         return max(0, delta.days)
     
     def to_dict(self) -> dict:
-        """Converte para dicionário"""
+        """
+        Converte para dicionário.
+        
+        Os campos fixos são memorizados até a próxima atribuição; os que
+        dependem da data atual (vencimento, possibilidade de pagamento) são
+        recalculados a cada chamada. Cada chamada devolve um dicionário novo.
+        """
+        return {
+            **self._dict_memorizado(),
+            'dias_para_vencimento': self.dias_para_vencimento(),
+            'pode_pagar': self.pode_ser_paga()[0],
+            'is_vencida': self.is_vencida()
+        }
+    
+    def _montar_dict(self) -> dict:
+        """Monta o dicionário de serialização (campos que não dependem da data)"""
         return {
             'id': self.id,
             'valor': float(self.valor),
@@ -107,24 +142,15 @@ class Taxa:
             'tipo': self.tipo,
             'status': self.status,
             'status_display': self._get_status_display(),
-            'data_vencimento': self.data_vencimento.strftime('%d/%m/%Y') if self.data_vencimento else None,
-            'data_pagamento': self.data_pagamento.strftime('%d/%m/%Y %H:%M') if self.data_pagamento else None,
+            'data_vencimento': formatar_data(self.data_vencimento) if self.data_vencimento else None,
+            'data_pagamento': formatar_data_hora(self.data_pagamento) if self.data_pagamento else None,
             'reserva_id': self.reserva_id,
             'associado_cpf': self.associado_cpf,
             'codigo_pagamento': self.codigo_pagamento,
             'observacoes': self.observacoes or '',
-            'data_criacao': self.data_criacao.strftime('%d/%m/%Y %H:%M') if self.data_criacao else '',
-            'dias_para_vencimento': self.dias_para_vencimento(),
-            'pode_pagar': self.pode_ser_paga()[0],
-            'is_vencida': self.is_vencida()
+            'data_criacao': formatar_data_hora(self.data_criacao) if self.data_criacao else ''
         }
     
     def _get_status_display(self) -> str:
         """Retorna status formatado para exibição"""
-        status_map = {
-            'pendente': 'Pendente',
-            'pago': 'Pago',
-            'vencido': 'Vencido',
-            'cancelado': 'Cancelado'
-        }
-        return status_map.get(self.status, self.status.title())
\ No newline at end of file
+        return _STATUS_DISPLAY.get(self.status, self.status.title())
\ No newline at end of file
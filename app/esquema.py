@@ -0,0 +1,90 @@
+"""
+Atualização do esquema de bancos já existentes - SINT-IFESGO
+
+O projeto não usa ferramenta de migração: db.create_all() só cria as tabelas
+que ainda não existem e nunca altera as antigas. As etapas abaixo levam um
+banco criado por versões anteriores ao esquema atual dos modelos.
+
+Todas são idempotentes (verificam o estado do banco antes de agir) e rodam a
+cada inicialização, depois do create_all e antes da criação dos índices.
+"""
+
+from sqlalchemy import String, inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+
+def atualizar_esquema(engine: Engine) -> None:
+    """Aplica, em uma única transação, as etapas pendentes no banco"""
+    with engine.begin() as conexao:
+        _adicionar_inicio_reservas(conexao)
+        _codificar_status(conexao)
+        _normalizar_emails(conexao)
+
+
+def _colunas(conexao: Connection, tabela: str) -> dict:
+    """Colunas existentes da tabela, por nome"""
+    return {coluna['name']: coluna for coluna in inspect(conexao).get_columns(tabela)}
+
+
+def _adicionar_inicio_reservas(conexao: Connection) -> None:
+    """
+    Cria a coluna reservas.inicio (data + horário de início combinados),
+    preenchendo-a para as reservas gravadas antes dela existir.
+    """
+    if 'inicio' in _colunas(conexao, 'reservas'):
+        return
+
+    if conexao.dialect.name == 'sqlite':
+        # Mesmo formato de texto em que o SQLAlchemy grava DateTime no SQLite
+        # ('AAAA-MM-DD HH:MM:SS.ffffff'): data e horário já são texto
+        conexao.execute(text('ALTER TABLE reservas ADD COLUMN inicio DATETIME'))
+        conexao.execute(text("UPDATE reservas SET inicio = data_reserva || ' ' || horario_inicio"))
+    else:
+        conexao.execute(text('ALTER TABLE reservas ADD COLUMN inicio TIMESTAMP WITHOUT TIME ZONE'))
+        conexao.execute(text('UPDATE reservas SET inicio = data_reserva + horario_inicio'))
+
+
+def _codificar_status(conexao: Connection) -> None:
+    """
+    Converte os status gravados como texto ('ativa', 'pendente'...) para os
+    códigos inteiros de StatusCodificado.
+    
+    No PostgreSQL a coluna passa a SMALLINT. No SQLite (sem ALTER COLUMN) a
+    coluna de texto é mantida e recebe os códigos: a afinidade de texto faz
+    `status = 1` continuar comparando corretamente, e a leitura aceita o
+    código em texto.
+    """
+    from app.models import STATUS_ADIMPLENCIA, STATUS_RESERVA, STATUS_TAXA
+    
+    for tabela, coluna, status in (('reservas', 'status', STATUS_RESERVA),
+                                   ('taxas', 'status', STATUS_TAXA),
+                                   ('associados', 'status_adimplencia', STATUS_ADIMPLENCIA)):
+        if not isinstance(_colunas(conexao, tabela)[coluna]['type'], String):
+            continue
+        
+        casos = ' '.join(f"WHEN '{valor}' THEN {codigo}" for codigo, valor in enumerate(status.valores))
+        conversao = f'CASE {coluna} {casos} END'
+        nomes = ', '.join(f"'{valor}'" for valor in status.valores)
+        
+        if conexao.dialect.name == 'sqlite':
+            conexao.execute(text(f'UPDATE {tabela} SET {coluna} = {conversao} WHERE {coluna} IN ({nomes})'))
+        else:
+            conexao.execute(text(f'ALTER TABLE {tabela} ALTER COLUMN {coluna} DROP DEFAULT'))
+            conexao.execute(text(
+                f'ALTER TABLE {tabela} ALTER COLUMN {coluna} TYPE SMALLINT '
+                f'USING (CASE WHEN {coluna} IN ({nomes}) THEN {conversao} END)'
+            ))
+            conexao.execute(text(
+                f'ALTER TABLE {tabela} ALTER COLUMN {coluna} SET DEFAULT {status.codigo(status.valores[0])}'
+            ))
+
+
+def _normalizar_emails(conexao: Connection) -> None:
+    """
+    Grava os emails de associados sem espaços nas pontas e em minúsculas,
+    como AssociadoService já os normaliza: a busca por email pode então
+    comparar o valor exato e usar o índice único da coluna.
+    """
+    conexao.execute(text(
+        'UPDATE associados SET email = lower(trim(email)) WHERE email <> lower(trim(email))'
+    ))
@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
 from typing import List, Dict, Optional, Tuple
-from datetime import date, time
+from datetime import date, datetime, time
 
 
 class IReservaRepository(ABC):
@@ -11,14 +11,35 @@ class IReservaRepository(ABC):
         """Cria uma nova reserva"""
         pass
     
+    @abstractmethod
+    def criar_reserva_atomica(self, reserva_data: Dict) -> Dict:
+        """
+        Verifica a disponibilidade e cria a reserva em uma única transação.
+        
+        A verificação e a inserção devem ser serializadas entre requisições
+        concorrentes, para que duas delas não ocupem horários sobrepostos.
+        """
+        pass
+    
     @abstractmethod
     def buscar_por_id(self, reserva_id: int) -> Optional[Dict]:
-        """Busca reserva por ID"""
+        """
+        Busca reserva por ID.
+        
+        Além dos campos de Reserva.to_dict, o dicionário traz '_inicio'
+        (datetime de início) para as regras de prazo do serviço.
+        """
         pass
     
     @abstractmethod
     def listar_reservas_ativas(self, data_inicio: date, data_fim: date) -> List[Dict]:
-        """Lista reservas ativas em um período"""
+        """
+        Lista reservas ativas em um período.
+        
+        Os dicionários retornados contêm apenas colunas da própria reserva;
+        dados de associado ou taxa devem ser carregados de forma explícita
+        (eager loading) pela implementação, nunca por acesso lazy por linha.
+        """
         pass
     
     @abstractmethod
@@ -31,6 +52,15 @@ class IReservaRepository(ABC):
         """Cancela uma reserva"""
         pass
     
+    @abstractmethod
+    def cancelar_se_elegivel(self, reserva_id: int, inicio_minimo: datetime,
+                             email_confirmacao: Optional[str] = None) -> bool:
+        """
+        Cancela, em um único UPDATE condicional, a reserva ativa que começa
+        a partir de `inicio_minimo` e cujo email confere (quando informado).
+        """
+        pass
+    
     @abstractmethod
     def obter_horarios_ocupados(self, data_reserva: date) -> List[Dict]:
         """Retorna horários ocupados para uma data"""
@@ -27,13 +27,85 @@ Versão: 1.0
 """
 
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime, date, time
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
+from datetime import datetime, time
 from decimal import Decimal
-import re
+from functools import cached_property
+import os
+import threading
+from app.entities.associado import _validar_cpf
+from app import relogio
 
 # Instância global do SQLAlchemy para uso em toda a aplicação
 db = SQLAlchemy()
 
+
+class StatusCodificado(db.TypeDecorator):
+    """
+    Status gravado como SMALLINT (índice na tupla de valores).
+    
+    O código da aplicação continua lendo e comparando strings ('ativa',
+    'pendente'...); a conversão acontece apenas na fronteira com o banco,
+    deixando índices e filtros de status com chave inteira de 2 bytes.
+    """
+    
+    impl = db.SmallInteger
+    cache_ok = True
+    
+    def __init__(self, valores: tuple):
+        super().__init__()
+        self.valores = valores
+        self._codigos = {valor: codigo for codigo, valor in enumerate(valores)}
+    
+    def codigo(self, valor: str) -> int:
+        """Retorna o código inteiro de um status"""
+        try:
+            return self._codigos[valor]
+        except KeyError:
+            raise ValueError(f"Status inválido: {valor}") from None
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return self.codigo(value)
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, str):
+            # Colunas de texto de bancos anteriores aos códigos: o SQLite
+            # devolve o código como texto ('1'); linhas ainda não convertidas
+            # trazem o próprio nome do status
+            return self.valores[int(value)] if value.isdigit() else value
+        return self.valores[value]
+    
+    def validar(self, chave, valor):
+        """Validador de atribuição (db.validates): rejeita status desconhecidos"""
+        if valor is not None:
+            self.codigo(valor)
+        return valor
+
+
+STATUS_RESERVA = StatusCodificado(('pendente', 'ativa', 'cancelada', 'paga', 'realizada', 'vencida'))
+STATUS_TAXA = StatusCodificado(('pendente', 'pago', 'vencido', 'cancelado'))
+STATUS_ADIMPLENCIA = StatusCodificado(('adimplente', 'inadimplente'))
+
+# Textos de exibição dos status (consulta única por linha serializada)
+STATUS_RESERVA_DISPLAY = {
+    'pendente': 'Pendente',
+    'ativa': 'Ativa',
+    'cancelada': 'Cancelada',
+    'paga': 'Paga',
+    'realizada': 'Realizada',
+    'vencida': 'Vencida'
+}
+STATUS_TAXA_DISPLAY = {
+    'pendente': 'Pendente',
+    'pago': 'Pago',
+    'vencido': 'Vencido',
+    'cancelado': 'Cancelado'
+}
+
 class Reserva(db.Model):
     """
     Modelo de dados para reservas de churrasqueira.
@@ -51,6 +123,7 @@ class Reserva(db.Model):
         data_reserva (date): Data da reserva
         horario_inicio (time): Horário de início da reserva
         horario_fim (time): Horário de término da reserva
+        inicio (datetime): Data e horário de início combinados (calculado)
         numero_convidados (int): Número de pessoas no evento
         status (str): Status atual da reserva (pendente, ativa, cancelada, paga)
         data_criacao (datetime): Timestamp de criação da reserva
@@ -66,6 +139,28 @@ class Reserva(db.Model):
     """
     
     __tablename__ = 'reservas'
+    __table_args__ = (
+        # Garante no banco que não existam duas reservas ativas com o mesmo
+        # início na mesma data; sobreposições com inícios diferentes são
+        # barradas por ReservaRepository.criar_reserva_atomica (e, no
+        # PostgreSQL, pela restrição de exclusão abaixo)
+        db.Index('uq_reserva_ativa_inicio', 'data_reserva', 'horario_inicio',
+                 unique=True,
+                 sqlite_where=db.text(f"status = {STATUS_RESERVA.codigo('ativa')}"),
+                 postgresql_where=db.text(f"status = {STATUS_RESERVA.codigo('ativa')}")),
+        # Índice composto das consultas quentes: filtro por data + status e
+        # ordenação/agrupamento pelos horários, servidos direto do índice
+        db.Index('ix_reservas_data_status_horarios',
+                 'data_reserva', 'status', 'horario_inicio', 'horario_fim'),
+        # PostgreSQL: nenhuma sobreposição de períodos entre reservas ativas,
+        # verificada por índice GiST mesmo entre transações concorrentes
+        ExcludeConstraint(
+            (db.func.tsrange(db.column('inicio'), db.text('data_reserva + horario_fim'), '[)'), '&&'),
+            name='ex_reservas_ativas_sem_sobreposicao',
+            using='gist',
+            where=db.text(f"status = {STATUS_RESERVA.codigo('ativa')}")
+        ).ddl_if(dialect='postgresql'),
+    )
     
     # Campos principais da reserva
     id = db.Column(db.Integer, primary_key=True)
@@ -74,44 +169,79 @@ class Reserva(db.Model):
     telefone = db.Column(db.String(20), nullable=True, comment='Telefone para contato')
     
     # Relacionamento com associado (obrigatório para SINT-IFESGO)
-    cpf_associado = db.Column(db.String(11), db.ForeignKey('associados.cpf'), nullable=True, 
+    cpf_associado = db.Column(db.CHAR(11), db.ForeignKey('associados.cpf'), nullable=True, 
                              comment='CPF do associado responsável')
     
     # Dados temporais da reserva
     data_reserva = db.Column(db.Date, nullable=False, comment='Data da reserva')
     horario_inicio = db.Column(db.Time, nullable=False, comment='Horário de início')
     horario_fim = db.Column(db.Time, nullable=False, comment='Horário de término')
+    inicio = db.Column(db.DateTime, nullable=False, index=True,
+                       comment='Data e horário de início combinados (mantido por evento)')
     
     # Informações do evento
-    numero_convidados = db.Column(db.Integer, default=1, comment='Número de convidados')
+    numero_convidados = db.Column(db.Integer, default=1, server_default='1', comment='Número de convidados')
     
     # Controle de status e auditoria
-    status = db.Column(db.String(20), default='pendente', 
+    status = db.Column(STATUS_RESERVA, default='pendente',
+                      server_default=db.text(str(STATUS_RESERVA.codigo('pendente'))),
                       comment='Status: pendente, ativa, cancelada, paga, realizada, vencida')
-    data_criacao = db.Column(db.DateTime, default=datetime.utcnow, 
+    data_criacao = db.Column(db.DateTime, default=relogio.agora_utc,
                             comment='Timestamp de criação')
     observacoes = db.Column(db.Text, nullable=True, comment='Observações adicionais')
     
     # Relacionamentos
-    taxas = db.relationship('Taxa', backref='reserva_obj', lazy=True)
+    taxas = db.relationship('Taxa', back_populates='reserva_obj', lazy=True)
+    associado_obj = db.relationship('Associado', back_populates='reservas',
+                                    foreign_keys=[cpf_associado])
+    
+    @db.validates('status')
+    def _validar_status(self, chave, valor):
+        return STATUS_RESERVA.validar(chave, valor)
     
     def __repr__(self):
         return f'<Reserva {self.nome} em {self.data_reserva} das {self.horario_inicio} às {self.horario_fim}>'
     
+    @db.validates('data_reserva', 'horario_inicio', 'horario_fim', 'data_criacao')
+    def _invalidar_formatados(self, chave, valor):
+        """Descarta as formatações memorizadas quando data ou horários são alterados"""
+        for nome in _FORMATADOS_RESERVA:
+            self.__dict__.pop(nome, None)
+        return valor
+    
+    # Formatações memorizadas por instância (descartadas pelo validador acima
+    # e pelos eventos de recarga após a classe)
+    @cached_property
+    def data_reserva_formatada(self):
+        return self.data_reserva.strftime('%d/%m/%Y')
+    
+    @cached_property
+    def horario_inicio_formatado(self):
+        return self.horario_inicio.strftime('%H:%M')
+    
+    @cached_property
+    def horario_fim_formatado(self):
+        return self.horario_fim.strftime('%H:%M')
+    
+    @cached_property
+    def data_criacao_formatada(self):
+        # Linhas antigas podem ter a coluna vazia
+        return self.data_criacao.strftime('%d/%m/%Y %H:%M') if self.data_criacao else ''
+    
     def to_dict(self):
         return {
             'id': self.id,
             'nome': self.nome,
             'email': self.email,
             'telefone': self.telefone,
-            'data_reserva': self.data_reserva.strftime('%d/%m/%Y'),
-            'data_reserva_iso': self.data_reserva.strftime('%Y-%m-%d'),
-            'horario_inicio': self.horario_inicio.strftime('%H:%M'),
-            'horario_fim': self.horario_fim.strftime('%H:%M'),
+            'data_reserva': self.data_reserva_formatada,
+            'data_reserva_iso': self.data_reserva.isoformat(),
+            'horario_inicio': self.horario_inicio_formatado,
+            'horario_fim': self.horario_fim_formatado,
             'numero_convidados': self.numero_convidados,
             'status': self.status,
-            'status_display': 'Ativa' if self.status == 'ativa' else 'Cancelada',
-            'data_criacao': self.data_criacao.strftime('%d/%m/%Y %H:%M'),
+            'status_display': STATUS_RESERVA_DISPLAY.get(self.status, self.status.title()),
+            'data_criacao': self.data_criacao_formatada,
             'observacoes': self.observacoes or ''
         }
     
@@ -120,20 +250,26 @@ class Reserva(db.Model):
         """
         Verifica se há conflito de horários para uma data específica
         """
+        # A sobreposição é filtrada no banco; basta a primeira reserva conflitante
         query = cls.query.filter(
             cls.data_reserva == data_reserva,
-            cls.status == 'ativa'
+            cls.status == 'ativa',
+            cls.horario_inicio < horario_fim,
+            cls.horario_fim > horario_inicio
         )
         
         if excluir_id:
             query = query.filter(cls.id != excluir_id)
         
-        reservas_existentes = query.all()
+        # Ordenado pelo início (mesma ordem do índice composto): o conflito
+        # informado é sempre o mais cedo do dia
+        conflito = query.order_by(cls.horario_inicio).with_entities(
+            cls.horario_inicio, cls.horario_fim, cls.nome
+        ).first()
         
-        for reserva in reservas_existentes:
-            # Verifica sobreposição de horários
-            if (horario_inicio < reserva.horario_fim and horario_fim > reserva.horario_inicio):
-                return False, f"Conflito com reserva existente: {reserva.horario_inicio.strftime('%H:%M')} - {reserva.horario_fim.strftime('%H:%M')} ({reserva.nome})"
+        if conflito:
+            inicio, fim, nome = conflito
+            return False, f"Conflito com reserva existente: {inicio.strftime('%H:%M')} - {fim.strftime('%H:%M')} ({nome})"
         
         return True, "Horário disponível"
     
@@ -145,17 +281,16 @@ class Reserva(db.Model):
         reservas = cls.query.filter(
             cls.data_reserva == data_reserva,
             cls.status == 'ativa'
-        ).all()
-        
-        horarios_ocupados = []
-        for reserva in reservas:
-            horarios_ocupados.append({
-                'inicio': reserva.horario_inicio.strftime('%H:%M'),
-                'fim': reserva.horario_fim.strftime('%H:%M'),
-                'nome': reserva.nome
-            })
+        ).with_entities(cls.horario_inicio, cls.horario_fim, cls.nome).all()
         
-        return horarios_ocupados
+        return [
+            {
+                'inicio': inicio.strftime('%H:%M'),
+                'fim': fim.strftime('%H:%M'),
+                'nome': nome
+            }
+            for inicio, fim, nome in reservas
+        ]
     
     def cancelar_reserva(self, motivo=None):
         """
@@ -173,43 +308,77 @@ class Reserva(db.Model):
         if self.status != 'ativa':
             return False, "Reserva já foi cancelada"
         
-        agora = datetime.now()
-        data_hora_reserva = datetime.combine(self.data_reserva, self.horario_inicio)
+        # `inicio` só é preenchido no flush; antes disso combina data e horário
+        inicio = self.inicio or datetime.combine(self.data_reserva, self.horario_inicio)
+        segundos_ate_inicio = (inicio - relogio.agora()).total_seconds()
         
-        if data_hora_reserva <= agora:
+        if segundos_ate_inicio <= 0:
             return False, "Não é possível cancelar reservas que já começaram"
         
-        diferenca = data_hora_reserva - agora
-        if diferenca.total_seconds() < 24 * 3600:  # 24 horas
+        if segundos_ate_inicio < 24 * 3600:  # 24 horas
             return False, "Cancelamento deve ser feito com pelo menos 24h de antecedência"
         
         return True, "Reserva pode ser cancelada"
 
 
+@db.event.listens_for(Reserva, 'before_insert')
+@db.event.listens_for(Reserva, 'before_update')
+def _atualizar_inicio_reserva(mapper, connection, reserva):
+    """Mantém a coluna `inicio` sincronizada com data_reserva + horario_inicio"""
+    reserva.inicio = datetime.combine(reserva.data_reserva, reserva.horario_inicio)
+
+
+# Nomes das formatações memorizadas de Reserva (cached_property)
+_FORMATADOS_RESERVA = ('data_reserva_formatada', 'horario_inicio_formatado',
+                       'horario_fim_formatado', 'data_criacao_formatada')
+
+
+@db.event.listens_for(Reserva, 'expire')
+@db.event.listens_for(Reserva, 'refresh')
+def _descartar_formatados_reserva(reserva, *args):
+    """Valores recarregados do banco invalidam as formatações memorizadas"""
+    for nome in _FORMATADOS_RESERVA:
+        reserva.__dict__.pop(nome, None)
+
+
 class Associado(db.Model):
     """Modelo para Associados do SINT-IFESGO"""
     __tablename__ = 'associados'
+    __table_args__ = (
+        # Também atende filtros só por status_adimplencia (coluna líder)
+        db.Index('ix_associados_adimplencia_ativo', 'status_adimplencia', 'ativo'),
+        # CPF sempre gravado com exatamente 11 dígitos (sem formatação)
+        db.CheckConstraint("cpf GLOB '" + "[0-9]" * 11 + "'",
+                           name='ck_associados_cpf_digitos').ddl_if(dialect='sqlite'),
+        db.CheckConstraint("cpf ~ '^[0-9]{11}$'",
+                           name='ck_associados_cpf_digitos').ddl_if(dialect='postgresql'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    cpf = db.Column(db.String(11), unique=True, nullable=False, index=True)
+    cpf = db.Column(db.CHAR(11), unique=True, nullable=False, index=True)
     nome = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(100), nullable=False, unique=True)
     telefone = db.Column(db.String(20), nullable=True)
-    status_adimplencia = db.Column(db.String(20), default='adimplente')  # adimplente, inadimplente
+    status_adimplencia = db.Column(STATUS_ADIMPLENCIA, default='adimplente',
+                                   server_default=db.text(str(STATUS_ADIMPLENCIA.codigo('adimplente'))))  # adimplente, inadimplente
     data_ultimo_pagamento = db.Column(db.Date, nullable=True)
-    data_cadastro = db.Column(db.DateTime, default=datetime.utcnow)
-    ativo = db.Column(db.Boolean, default=True)
+    data_cadastro = db.Column(db.DateTime, default=relogio.agora_utc)
+    ativo = db.Column(db.Boolean, default=True, server_default=db.true())
     
     # Relacionamentos
-    reservas = db.relationship('Reserva', backref='associado_obj', lazy=True, foreign_keys='Reserva.cpf_associado')
-    taxas = db.relationship('Taxa', backref='associado_obj', lazy=True, foreign_keys='Taxa.associado_cpf')
+    reservas = db.relationship('Reserva', back_populates='associado_obj', lazy=True, foreign_keys='Reserva.cpf_associado')
+    taxas = db.relationship('Taxa', back_populates='associado_obj', lazy=True, foreign_keys='Taxa.associado_cpf')
+    
+    @db.validates('status_adimplencia')
+    def _validar_status(self, chave, valor):
+        return STATUS_ADIMPLENCIA.validar(chave, valor)
     
     def __repr__(self):
         return f'<Associado {self.nome} - CPF: {self.cpf_formatado}>'
     
-    @property
+    @cached_property
     def cpf_formatado(self):
-        """Retorna CPF formatado"""
+        """Retorna CPF formatado (memorizado: o CPF não muda após o cadastro)"""
         cpf = self.cpf
         return f"{cpf[:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:]}"
     
@@ -230,35 +399,9 @@ class Associado(db.Model):
     @staticmethod
     def validar_cpf(cpf: str):
         """Valida CPF usando algoritmo oficial"""
-        cpf = re.sub(r'[^\d]', '', cpf)
-        
-        if len(cpf) != 11:
-            return False, "CPF deve ter 11 dígitos"
-        
-        # CPFs inválidos conhecidos
-        if cpf in ['00000000000', '11111111111', '22222222222', 
-                   '33333333333', '44444444444', '55555555555',
-                   '66666666666', '77777777777', '88888888888',
-                   '99999999999']:
-            return False, "CPF inválido"
-        
-        # Validação do primeiro dígito
-        soma = sum(int(cpf[i]) * (10 - i) for i in range(9))
-        resto = soma % 11
-        digito1 = 0 if resto < 2 else 11 - resto
-        
-        if int(cpf[9]) != digito1:
-            return False, "CPF inválido"
-        
-        # Validação do segundo dígito
-        soma = sum(int(cpf[i]) * (11 - i) for i in range(10))
-        resto = soma % 11
-        digito2 = 0 if resto < 2 else 11 - resto
-        
-        if int(cpf[10]) != digito2:
-            return False, "CPF inválido"
-        
-        return True, "CPF válido"
+        # Mesmo validador da entidade: regex pré-compilada, dígitos via bytes
+        # e resultado memorizado por CPF
+        return _validar_cpf(cpf)
     
     def to_dict(self):
         """Converte para dicionário"""
@@ -278,21 +421,85 @@ class Associado(db.Model):
         }
 
 
+# Precisão monetária usada na formatação de valores
+_CENTAVOS = Decimal('0.01')
+
+
+class _PoolCodigos:
+    """
+    Fornece sufixos aleatórios de 8 caracteres hexadecimais para códigos de
+    pagamento, lendo os.urandom em blocos em vez de uma chamada por código.
+    
+    A unicidade continua garantida pela constraint UNIQUE de codigo_pagamento.
+    Processos filhos criados por fork (workers do gunicorn, por exemplo)
+    descartam o bloco herdado: do contrário repetiriam os códigos do pai.
+    """
+    
+    _BYTES_POR_CODIGO = 4
+    
+    def __init__(self, codigos_por_bloco: int = 4096):
+        self._tamanho_bloco = codigos_por_bloco * self._BYTES_POR_CODIGO
+        self._descartar_bloco()
+    
+    def _descartar_bloco(self) -> None:
+        """Esvazia o bloco atual; o próximo código lê um bloco novo"""
+        self._buffer = b''
+        self._posicao = 0
+        # Lock novo: no filho de um fork o herdado pode ter ficado adquirido
+        self._lock = threading.Lock()
+    
+    def proximo(self) -> str:
+        """Retorna o próximo sufixo (ex.: '9F3A01BC')"""
+        with self._lock:
+            if self._posicao + self._BYTES_POR_CODIGO > len(self._buffer):
+                self._buffer = os.urandom(self._tamanho_bloco)
+                self._posicao = 0
+            inicio = self._posicao
+            self._posicao += self._BYTES_POR_CODIGO
+            fatia = self._buffer[inicio:self._posicao]
+        return fatia.hex().upper()
+
+
+_pool_codigos = _PoolCodigos()
+
+if hasattr(os, 'register_at_fork'):  # indisponível no Windows, que não usa fork
+    os.register_at_fork(after_in_child=_pool_codigos._descartar_bloco)
+
+
 class Taxa(db.Model):
     """Modelo para Taxas de Reserva e outras taxas"""
     __tablename__ = 'taxas'
+    __table_args__ = (
+        db.Index('ix_taxas_reserva_status', 'reserva_id', 'status'),
+        # Pendentes/vencidas por vencimento (listar_taxas_vencidas)
+        db.Index('ix_taxas_status_vencimento', 'status', 'data_vencimento'),
+        # Taxas de um associado (minha conta, listagem por CPF)
+        db.Index('ix_taxas_associado_status', 'associado_cpf', 'status'),
+        # Relatório financeiro por período de criação
+        db.Index('ix_taxas_data_criacao', 'data_criacao'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     valor = db.Column(db.Numeric(10, 2), nullable=False)  # Usando Numeric para decimal
     tipo = db.Column(db.String(20), nullable=False)  # 'reserva', 'sindical', etc.
-    status = db.Column(db.String(20), default='pendente')  # pendente, pago, vencido, cancelado
+    status = db.Column(STATUS_TAXA, default='pendente',
+                       server_default=db.text(str(STATUS_TAXA.codigo('pendente'))))  # pendente, pago, vencido, cancelado
     data_vencimento = db.Column(db.Date, nullable=True)
     data_pagamento = db.Column(db.DateTime, nullable=True)
     reserva_id = db.Column(db.Integer, db.ForeignKey('reservas.id'), nullable=True)
-    associado_cpf = db.Column(db.String(11), db.ForeignKey('associados.cpf'), nullable=True)
+    associado_cpf = db.Column(db.CHAR(11), db.ForeignKey('associados.cpf'), nullable=True)
     codigo_pagamento = db.Column(db.String(50), unique=True, nullable=True)
     observacoes = db.Column(db.Text, nullable=True)
-    data_criacao = db.Column(db.DateTime, default=datetime.utcnow)
+    data_criacao = db.Column(db.DateTime, default=relogio.agora_utc)
+    
+    # Relacionamentos
+    reserva_obj = db.relationship('Reserva', back_populates='taxas')
+    associado_obj = db.relationship('Associado', back_populates='taxas',
+                                    foreign_keys=[associado_cpf])
+    
+    @db.validates('status')
+    def _validar_status(self, chave, valor):
+        return STATUS_TAXA.validar(chave, valor)
     
     def __repr__(self):
         return f'<Taxa {self.tipo} - R$ {self.valor} - Status: {self.status}>'
@@ -311,19 +518,19 @@ class Taxa(db.Model):
             return True
         
         if self.status == 'pendente' and self.data_vencimento:
-            return date.today() > self.data_vencimento
+            return relogio.hoje() > self.data_vencimento
         
         return False
     
     def valor_formatado(self):
         """Retorna valor formatado em Real"""
-        return f"R$ {float(self.valor):.2f}".replace('.', ',')
+        # Decimal arredondado em centavos, sem passar por float
+        reais, centavos = format(Decimal(self.valor).quantize(_CENTAVOS), 'f').split('.')
+        return f"R$ {reais},{centavos}"
     
     def gerar_codigo_pagamento(self):
         """Gera código único para pagamento"""
-        import uuid
-        codigo = str(uuid.uuid4())[:8].upper()
-        self.codigo_pagamento = f"SINT{codigo}"
+        self.codigo_pagamento = f"SINT{_pool_codigos.proximo()}"
         return self.codigo_pagamento
     
     def to_dict(self):
@@ -347,57 +554,73 @@ class Taxa(db.Model):
     
     def _get_status_display(self):
         """Retorna status formatado para exibição"""
-        status_map = {
-            'pendente': 'Pendente',
-            'pago': 'Pago',
-            'vencido': 'Vencido',
-            'cancelado': 'Cancelado'
-        }
-        return status_map.get(self.status, self.status.title())
+        return STATUS_TAXA_DISPLAY.get(self.status, self.status.title())
+
+
+_PRIORIDADES_URGENTES = frozenset(('alta', 'critica'))
+
+# Classes CSS dos boletins: primeiro pela prioridade, depois pelo tipo
+_CLASSE_CSS_POR_PRIORIDADE = {'critica': 'alert-danger', 'alta': 'alert-warning'}
+_CLASSE_CSS_POR_TIPO = {'urgente': 'alert-warning', 'evento': 'alert-info'}
 
 
 class Boletim(db.Model):
     """Modelo para Boletins Informativos do SINT-IFESGO"""
     __tablename__ = 'boletins'
+    __table_args__ = (
+        # Listagem de ativos ordenada por prioridade e publicação
+        db.Index('ix_boletins_ativo_prioridade_publicacao', 'ativo', 'prioridade', 'data_publicacao'),
+        # Expiração automática e filtro de não expirados
+        db.Index('ix_boletins_ativo_expiracao', 'ativo', 'data_expiracao'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     titulo = db.Column(db.String(200), nullable=False)
     conteudo = db.Column(db.Text, nullable=False)
-    tipo = db.Column(db.String(20), default='geral')  # geral, urgente, comunicado, evento
-    prioridade = db.Column(db.String(20), default='normal')  # baixa, normal, alta, critica
-    data_publicacao = db.Column(db.DateTime, default=datetime.utcnow)
+    tipo = db.Column(db.String(20), default='geral', server_default='geral')  # geral, urgente, comunicado, evento
+    prioridade = db.Column(db.String(20), default='normal', server_default='normal')  # baixa, normal, alta, critica
+    data_publicacao = db.Column(db.DateTime, default=relogio.agora_utc)
     data_expiracao = db.Column(db.DateTime, nullable=True)
-    ativo = db.Column(db.Boolean, default=True)
+    ativo = db.Column(db.Boolean, default=True, server_default=db.true())
     autor = db.Column(db.String(100), nullable=True)
-    destinatarios = db.Column(db.String(20), default='todos')  # todos, adimplentes, inadimplentes
+    destinatarios = db.Column(db.String(20), default='todos', server_default='todos')  # todos, adimplentes, inadimplentes
     
     def __repr__(self):
         return f'<Boletim {self.titulo} - {self.tipo}>'
     
-    def is_ativo(self):
-        """Verifica se o boletim está ativo"""
+    def is_ativo(self, agora=None):
+        """
+        Verifica se o boletim está ativo.
+        
+        Listagens passam `agora` para consultar o relógio uma única vez.
+        """
         if not self.ativo:
             return False
         
         # Verifica se não expirou
-        if self.data_expiracao and datetime.utcnow() > self.data_expiracao:
+        if self.data_expiracao and (agora or relogio.agora_utc()) > self.data_expiracao:
             return False
         
         return True
     
     def is_urgente(self):
         """Verifica se é boletim urgente"""
-        return self.prioridade in ['alta', 'critica'] or self.tipo == 'urgente'
+        return self.prioridade in _PRIORIDADES_URGENTES or self.tipo == 'urgente'
     
     def deve_notificar_associado(self, status_adimplencia: str):
         """Verifica se deve notificar associado baseado no status"""
-        if self.destinatarios == 'todos':
+        return Boletim.destinatarios_incluem(self.destinatarios, status_adimplencia)
+    
+    @staticmethod
+    def destinatarios_incluem(destinatarios: str, status_adimplencia: str) -> bool:
+        """Regra de destinatários, aplicável também a boletins já serializados"""
+        if destinatarios == 'todos':
             return True
         
-        if self.destinatarios == 'adimplentes' and status_adimplencia == 'adimplente':
+        if destinatarios == 'adimplentes' and status_adimplencia == 'adimplente':
             return True
         
-        if self.destinatarios == 'inadimplentes' and status_adimplencia == 'inadimplente':
+        if destinatarios == 'inadimplentes' and status_adimplencia == 'inadimplente':
             return True
         
         return False
@@ -409,32 +632,56 @@ class Boletim(db.Model):
         
         return self.conteudo[:max_chars] + "..."
     
-    def to_dict(self):
-        """Converte para dicionário"""
+    @cached_property
+    def resumo_padrao(self):
+        """Resumo com o tamanho padrão, calculado uma vez por instância"""
+        return self.resumo()
+    
+    @db.validates('titulo', 'conteudo', 'tipo', 'prioridade', 'data_expiracao',
+                  'ativo', 'autor', 'destinatarios')
+    def _invalidar_memorizados(self, chave, valor):
+        """Descarta resumo e dicionário memorizados quando um campo é alterado"""
+        self.__dict__.pop('resumo_padrao', None)
+        self.__dict__.pop('_dict_base', None)
+        return valor
+    
+    @cached_property
+    def _dict_base(self):
+        """Campos de to_dict que não dependem do instante da consulta"""
+        return self._montar_dict_base()
+    
+    def _montar_dict_base(self):
         return {
             'id': self.id,
             'titulo': self.titulo,
             'conteudo': self.conteudo,
-            'resumo': self.resumo(),
+            'resumo': self.resumo_padrao,
             'tipo': self.tipo,
             'prioridade': self.prioridade,
             'data_publicacao': self.data_publicacao.strftime('%d/%m/%Y %H:%M') if self.data_publicacao else '',
             'data_expiracao': self.data_expiracao.strftime('%d/%m/%Y %H:%M') if self.data_expiracao else None,
             'ativo': self.ativo,
-            'is_ativo': self.is_ativo(),
             'is_urgente': self.is_urgente(),
             'autor': self.autor or 'SINT-IFESGO',
             'destinatarios': self.destinatarios,
             'classe_css': self._get_classe_css()
         }
     
+    def to_dict(self, agora=None):
+        """Converte para dicionário"""
+        # Antes do flush id/data_publicacao ainda não existem: não memorizar
+        base = self._dict_base if self.id is not None else self._montar_dict_base()
+        return {**base, 'is_ativo': self.is_ativo(agora)}
+    
     def _get_classe_css(self):
         """Retorna classe CSS baseada no tipo e prioridade"""
-        if self.prioridade == 'critica':
-            return 'alert-danger'
-        elif self.prioridade == 'alta' or self.tipo == 'urgente':
-            return 'alert-warning'
-        elif self.tipo == 'evento':
-            return 'alert-info'
-        else:
-            return 'alert-primary'
\ No newline at end of file
+        # A prioridade tem precedência sobre o tipo
+        return (_CLASSE_CSS_POR_PRIORIDADE.get(self.prioridade)
+                or _CLASSE_CSS_POR_TIPO.get(self.tipo, 'alert-primary'))
+
+@db.event.listens_for(Boletim, 'expire')
+@db.event.listens_for(Boletim, 'refresh')
+def _descartar_memorizados_boletim(boletim, *args):
+    """Valores recarregados do banco invalidam resumo e dicionário memorizados"""
+    boletim.__dict__.pop('resumo_padrao', None)
+    boletim.__dict__.pop('_dict_base', None)
@@ -0,0 +1,48 @@
+"""
+Relógio da aplicação.
+
+Dentro de uma requisição, `hoje()`, `agora()` e `agora_utc()` devolvem sempre
+o mesmo instante (guardado em flask.g na primeira leitura), para que as várias
+etapas de validação e cobrança concordem sobre a data mesmo perto da
+meia-noite. Fora de requisições (scripts, CLI) leem o relógio a cada chamada.
+"""
+
+from datetime import date, datetime, timezone
+from flask import g, has_request_context
+
+
+def hoje() -> date:
+    """Data local atual (fixa durante a requisição)"""
+    if not has_request_context():
+        return date.today()
+    if '_relogio_hoje' not in g:
+        g._relogio_hoje = date.today()
+    return g._relogio_hoje
+
+
+def agora() -> datetime:
+    """
+    Data e hora locais atuais, sem tzinfo (fixas durante a requisição).
+
+    Datas e horários das reservas são do relógio local: prazos calculados a
+    partir deles usam este instante, e não o UTC.
+    """
+    if not has_request_context():
+        return datetime.now()
+    if '_relogio_agora_local' not in g:
+        g._relogio_agora_local = datetime.now()
+    return g._relogio_agora_local
+
+
+def agora_utc() -> datetime:
+    """
+    Instante atual em UTC, sem tzinfo (fixo durante a requisição).
+
+    Mantém o formato ingênuo das colunas DateTime do banco, substituindo o
+    datetime.utcnow(), obsoleto a partir do Python 3.12.
+    """
+    if not has_request_context():
+        return datetime.now(timezone.utc).replace(tzinfo=None)
+    if '_relogio_agora' not in g:
+        g._relogio_agora = datetime.now(timezone.utc).replace(tzinfo=None)
+    return g._relogio_agora
@@ -1,13 +1,32 @@
 from typing import List, Dict, Optional, Tuple
 from datetime import date, time, datetime
+from time import monotonic
+from sqlalchemy.exc import IntegrityError
+from app import relogio
 from app.interfaces.reserva_interfaces import IReservaRepository
 from app.entities.reserva import Reserva as ReservaEntity
-from app.models import db, Reserva as ReservaModel
+from app.models import db, Reserva as ReservaModel, STATUS_RESERVA_DISPLAY
+
+
+# Consulta por ID montada uma única vez (reaproveitada a cada chamada)
+_SELECT_RESERVA_POR_ID = db.select(ReservaModel.__table__).where(
+    ReservaModel.id == db.bindparam('reserva_id')
+)
+
+# Tempo (em segundos) que as estatísticas ficam memorizadas entre consultas.
+# As métricas dependem do dia corrente e de toda reserva ativa futura, então uma
+# tabela de resumo diário teria de ser recalculada com a mesma consulta a cada
+# escrita; a memorização por TTL, invalidada nas escritas, tem o mesmo efeito
+_ESTATISTICAS_TTL_S = 60
 
 
 class ReservaRepository(IReservaRepository):
     """Repositório concreto para reservas usando SQLAlchemy"""
     
+    def __init__(self):
+        # (expira_em, dia, estatisticas); invalidado ao criar/cancelar reservas
+        self._cache_estatisticas: Optional[Tuple[float, date, Dict]] = None
+    
     def criar_reserva(self, reserva_data: Dict) -> Dict:
         """Cria uma nova reserva no banco de dados"""
         try:
@@ -25,6 +44,7 @@ class ReservaRepository(IReservaRepository):
             
             db.session.add(nova_reserva)
             db.session.commit()
+            self._cache_estatisticas = None
             
             return {
                 'sucesso': True,
@@ -33,6 +53,45 @@ class ReservaRepository(IReservaRepository):
                 'reserva': self._model_to_dict(nova_reserva)
             }
             
+        except IntegrityError:
+            # Horário ocupado por outra requisição em paralelo: restrição de
+            # sobreposição (PostgreSQL) ou de mesmo início (índice único)
+            db.session.rollback()
+            return {
+                'sucesso': False,
+                'mensagem': 'Horário já reservado por outra solicitação'
+            }
+        except Exception as e:
+            db.session.rollback()
+            return {
+                'sucesso': False,
+                'mensagem': f'Erro ao criar reserva: {str(e)}'
+            }
+    
+    def criar_reserva_atomica(self, reserva_data: Dict) -> Dict:
+        """Verifica disponibilidade e cria a reserva na mesma transação"""
+        try:
+            # Verificação e inserção serializadas entre requisições concorrentes
+            self._bloquear_escrita()
+            
+            conflito = ReservaModel.query.filter(
+                ReservaModel.data_reserva == reserva_data['data_reserva'],
+                ReservaModel.status == 'ativa',
+                ReservaModel.horario_inicio < reserva_data['horario_fim'],
+                ReservaModel.horario_fim > reserva_data['horario_inicio']
+            ).order_by(ReservaModel.horario_inicio).with_entities(
+                ReservaModel.horario_inicio, ReservaModel.horario_fim, ReservaModel.nome
+            ).first()
+            
+            if conflito:
+                db.session.rollback()
+                return {
+                    'sucesso': False,
+                    'mensagem': f"Conflito com reserva existente: {conflito.horario_inicio.strftime('%H:%M')} - {conflito.horario_fim.strftime('%H:%M')} ({conflito.nome})"
+                }
+            
+            return self.criar_reserva(reserva_data)
+            
         except Exception as e:
             db.session.rollback()
             return {
@@ -40,12 +99,42 @@ class ReservaRepository(IReservaRepository):
                 'mensagem': f'Erro ao criar reserva: {str(e)}'
             }
     
+    def _bloquear_escrita(self):
+        """
+        Garante que nenhuma outra reserva seja gravada entre a verificação de
+        conflito e o INSERT de criar_reserva_atomica.
+        
+        SQLite: abre a transação com BEGIN IMMEDIATE, que já toma o bloqueio
+        de escrita do banco; outra criação concorrente espera (busy timeout)
+        até o commit e então enxerga a reserva recém-gravada. Um SELECT FOR
+        UPDATE não serviria: não bloqueia linhas que ainda não existem, e o
+        SQLite ignora a cláusula.
+        
+        PostgreSQL: a ExcludeConstraint ex_reservas_ativas_sem_sobreposicao
+        rejeita no INSERT qualquer sobreposição gravada em paralelo
+        (IntegrityError, tratado em criar_reserva).
+        """
+        if db.session.get_bind().dialect.name != 'sqlite':
+            return
+        
+        conexao = db.session.connection().connection.dbapi_connection
+        # Com escrita já pendente na transação, o bloqueio já está com ela
+        if not conexao.in_transaction:
+            conexao.execute('BEGIN IMMEDIATE')
+    
     def buscar_por_id(self, reserva_id: int) -> Optional[Dict]:
         """Busca reserva por ID"""
         try:
-            reserva = ReservaModel.query.get(reserva_id)
-            if reserva:
-                return self._model_to_dict(reserva)
+            # Leitura somente para resposta: Core, sem identity map nem instrumentação
+            linha = db.session.execute(
+                _SELECT_RESERVA_POR_ID, {'reserva_id': reserva_id}
+            ).first()
+            if linha:
+                reserva = self._linha_to_dict(linha)
+                # Início nativo para regras de prazo, sem reinterpretar strings;
+                # chave privada, removida antes de qualquer resposta
+                reserva['_inicio'] = linha.inicio
+                return reserva
             return None
         except Exception:
             return None
@@ -53,7 +142,11 @@ class ReservaRepository(IReservaRepository):
     def listar_reservas_ativas(self, data_inicio: date, data_fim: date) -> List[Dict]:
         """Lista reservas ativas em um período"""
         try:
-            reservas = ReservaModel.query.filter(
+            # raiseload: a listagem não acessa relacionamentos; qualquer acesso
+            # acidental falha em vez de gerar uma consulta extra por linha (N+1).
+            # Todas as colunas são serializadas em to_dict (inclusive observacoes),
+            # então não há colunas a adiar com load_only
+            reservas = ReservaModel.query.options(db.raiseload('*')).filter(
                 ReservaModel.data_reserva >= data_inicio,
                 ReservaModel.data_reserva <= data_fim,
                 ReservaModel.status == 'ativa'
@@ -66,15 +159,19 @@ class ReservaRepository(IReservaRepository):
     def verificar_disponibilidade(self, data: date, inicio: time, fim: time) -> Tuple[bool, str]:
         """Verifica disponibilidade de horário"""
         try:
-            reservas_existentes = ReservaModel.query.filter(
+            # A sobreposição é filtrada no banco; basta a primeira reserva conflitante
+            conflito = ReservaModel.query.filter(
                 ReservaModel.data_reserva == data,
-                ReservaModel.status == 'ativa'
-            ).all()
+                ReservaModel.status == 'ativa',
+                ReservaModel.horario_inicio < fim,
+                ReservaModel.horario_fim > inicio
+            ).order_by(ReservaModel.horario_inicio).with_entities(
+                ReservaModel.horario_inicio, ReservaModel.horario_fim, ReservaModel.nome
+            ).first()
             
-            for reserva in reservas_existentes:
-                # Verifica sobreposição de horários
-                if (inicio < reserva.horario_fim and fim > reserva.horario_inicio):
-                    return False, f"Conflito com reserva existente: {reserva.horario_inicio.strftime('%H:%M')} - {reserva.horario_fim.strftime('%H:%M')} ({reserva.nome})"
+            if conflito:
+                horario_inicio, horario_fim, nome = conflito
+                return False, f"Conflito com reserva existente: {horario_inicio.strftime('%H:%M')} - {horario_fim.strftime('%H:%M')} ({nome})"
             
             return True, "Horário disponível"
             
@@ -84,12 +181,52 @@ class ReservaRepository(IReservaRepository):
     def cancelar_reserva(self, reserva_id: int) -> bool:
         """Cancela uma reserva"""
         try:
-            reserva = ReservaModel.query.get(reserva_id)
-            if reserva and reserva.status == 'ativa':
-                reserva.status = 'cancelada'
-                db.session.commit()
-                return True
+            # UPDATE condicional: verificação e alteração em uma única ida ao
+            # banco, sem corrida entre dois cancelamentos simultâneos
+            resultado = db.session.execute(
+                db.update(ReservaModel).where(
+                    ReservaModel.id == reserva_id,
+                    ReservaModel.status == 'ativa'
+                ).values(status='cancelada')
+            )
+            db.session.commit()
+            
+            if resultado.rowcount != 1:
+                return False
+            
+            self._cache_estatisticas = None
+            return True
+        except Exception:
+            db.session.rollback()
             return False
+    
+    def cancelar_se_elegivel(self, reserva_id: int, inicio_minimo: datetime,
+                             email_confirmacao: Optional[str] = None) -> bool:
+        """Cancela a reserva ativa que começa a partir de `inicio_minimo` (email conferido, se informado)"""
+        try:
+            condicoes = [
+                ReservaModel.id == reserva_id,
+                ReservaModel.status == 'ativa',
+                ReservaModel.inicio >= inicio_minimo
+            ]
+            if email_confirmacao:
+                # Reservas sem email dispensam a confirmação
+                condicoes.append(db.or_(
+                    ReservaModel.email.is_(None),
+                    ReservaModel.email == '',
+                    db.func.lower(db.func.trim(ReservaModel.email)) == email_confirmacao.lower().strip()
+                ))
+            
+            resultado = db.session.execute(
+                db.update(ReservaModel).where(*condicoes).values(status='cancelada')
+            )
+            db.session.commit()
+            
+            if resultado.rowcount != 1:
+                return False
+            
+            self._cache_estatisticas = None
+            return True
         except Exception:
             db.session.rollback()
             return False
@@ -100,54 +237,64 @@ class ReservaRepository(IReservaRepository):
             reservas = ReservaModel.query.filter(
                 ReservaModel.data_reserva == data_reserva,
                 ReservaModel.status == 'ativa'
+            ).with_entities(
+                ReservaModel.horario_inicio, ReservaModel.horario_fim, ReservaModel.nome
             ).all()
             
-            horarios_ocupados = []
-            for reserva in reservas:
-                horarios_ocupados.append({
-                    'inicio': reserva.horario_inicio.strftime('%H:%M'),
-                    'fim': reserva.horario_fim.strftime('%H:%M'),
-                    'nome': reserva.nome
-                })
-            
-            return horarios_ocupados
+            return [
+                {
+                    'inicio': horario_inicio.strftime('%H:%M'),
+                    'fim': horario_fim.strftime('%H:%M'),
+                    'nome': nome
+                }
+                for horario_inicio, horario_fim, nome in reservas
+            ]
         except Exception:
             return []
     
     def obter_estatisticas(self) -> Dict:
-        """Retorna estatísticas das reservas"""
+        """Retorna estatísticas das reservas (memorizadas por alguns segundos)"""
+        hoje = relogio.hoje()
+        agora = monotonic()
+        
+        # Cache válido enquanto não expirar o TTL nem virar o dia
+        if self._cache_estatisticas is not None:
+            expira_em, dia, estatisticas = self._cache_estatisticas
+            if agora < expira_em and dia == hoje:
+                return dict(estatisticas)
+        
         try:
+            ativa = ReservaModel.status == 'ativa'
+            primeiro_dia_mes = hoje.replace(day=1)
+            
             # Total de reservas ativas
-            total_ativas = ReservaModel.query.filter(
-                ReservaModel.status == 'ativa',
-                ReservaModel.data_reserva >= date.today()
-            ).count()
+            total_ativas = db.select(db.func.count(ReservaModel.id)).where(
+                ativa, ReservaModel.data_reserva >= hoje
+            ).scalar_subquery()
             
             # Reservas do mês atual
-            primeiro_dia_mes = date.today().replace(day=1)
-            reservas_mes = ReservaModel.query.filter(
-                ReservaModel.data_reserva >= primeiro_dia_mes,
-                ReservaModel.status == 'ativa'
-            ).count()
+            reservas_mes = db.select(db.func.count(ReservaModel.id)).where(
+                ativa, ReservaModel.data_reserva >= primeiro_dia_mes
+            ).scalar_subquery()
             
             # Horário mais popular
-            horario_popular_query = db.session.query(
-                ReservaModel.horario_inicio,
-                db.func.count(ReservaModel.id).label('total')
-            ).filter(
-                ReservaModel.status == 'ativa'
+            horario_popular = db.select(ReservaModel.horario_inicio).where(
+                ativa
             ).group_by(
                 ReservaModel.horario_inicio
             ).order_by(
                 db.func.count(ReservaModel.id).desc()
-            ).first()
+            ).limit(1).scalar_subquery()
             
-            horario_popular = horario_popular_query[0].strftime('%H:%M') if horario_popular_query else "N/A"
+            # As três métricas em uma única ida ao banco
+            total, mes, horario = db.session.execute(
+                db.select(total_ativas, reservas_mes, horario_popular)
+            ).one()
             
-            return {
-                'total_reservas_ativas': total_ativas,
-                'reservas_mes_atual': reservas_mes,
-                'horario_mais_popular': horario_popular
+            estatisticas = {
+                'total_reservas_ativas': total,
+                'reservas_mes_atual': mes,
+                'horario_mais_popular': horario.strftime('%H:%M') if horario else "N/A"
             }
         except Exception:
             return {
@@ -155,21 +302,29 @@ class ReservaRepository(IReservaRepository):
                 'reservas_mes_atual': 0,
                 'horario_mais_popular': 'N/A'
             }
+        
+        self._cache_estatisticas = (agora + _ESTATISTICAS_TTL_S, hoje, estatisticas)
+        return dict(estatisticas)
     
     def _model_to_dict(self, reserva: ReservaModel) -> Dict:
         """Converte model do SQLAlchemy para dicionário"""
+        # Mesmo formato do model, reaproveitando as formatações memorizadas
+        return reserva.to_dict()
+    
+    def _linha_to_dict(self, linha) -> Dict:
+        """Converte uma linha do Core para o mesmo dicionário de Reserva.to_dict"""
         return {
-            'id': reserva.id,
-            'nome': reserva.nome,
-            'email': reserva.email,
-            'telefone': reserva.telefone,
-            'data_reserva': reserva.data_reserva.strftime('%d/%m/%Y'),
-            'data_reserva_iso': reserva.data_reserva.strftime('%Y-%m-%d'),
-            'horario_inicio': reserva.horario_inicio.strftime('%H:%M'),
-            'horario_fim': reserva.horario_fim.strftime('%H:%M'),
-            'numero_convidados': reserva.numero_convidados,
-            'status': reserva.status,
-            'status_display': 'Ativa' if reserva.status == 'ativa' else 'Cancelada',
-            'data_criacao': reserva.data_criacao.strftime('%d/%m/%Y %H:%M'),
-            'observacoes': reserva.observacoes or ''
-        }
\ No newline at end of file
+            'id': linha.id,
+            'nome': linha.nome,
+            'email': linha.email,
+            'telefone': linha.telefone,
+            'data_reserva': linha.data_reserva.strftime('%d/%m/%Y'),
+            'data_reserva_iso': linha.data_reserva.isoformat(),
+            'horario_inicio': linha.horario_inicio.strftime('%H:%M'),
+            'horario_fim': linha.horario_fim.strftime('%H:%M'),
+            'numero_convidados': linha.numero_convidados,
+            'status': linha.status,
+            'status_display': STATUS_RESERVA_DISPLAY.get(linha.status, linha.status.title()),
+            'data_criacao': linha.data_criacao.strftime('%d/%m/%Y %H:%M') if linha.data_criacao else '',
+            'observacoes': linha.observacoes or ''
+        }
@@ -1,7 +1,13 @@
-from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash
+from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash, current_app
 from datetime import datetime, date, time, timedelta
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import os
+from types import SimpleNamespace
+from app import relogio
 from app.container import container
-from app.models import db, Reserva
+from sqlalchemy import func
+from app.models import db, Reserva, Taxa
 
 routes = Blueprint('routes', __name__)
 
@@ -11,6 +17,44 @@ associado_service = container.get_associado_service()
 taxa_service = container.get_taxa_service()
 boletim_service = container.get_boletim_service()
 
+# Extensões aceitas no upload de mídias para boletins
+_TIPOS_UPLOAD_PERMITIDOS = frozenset({'png', 'jpg', 'jpeg', 'gif', 'pdf', 'doc', 'docx'})
+
+_pasta_uploads_criada = None
+
+
+def _pasta_uploads() -> str:
+    """Retorna a pasta de uploads, criando-a apenas na primeira chamada"""
+    global _pasta_uploads_criada
+    if _pasta_uploads_criada is None:
+        caminho = os.path.join(os.getcwd(), 'static', 'uploads')
+        os.makedirs(caminho, exist_ok=True)
+        _pasta_uploads_criada = caminho
+    return _pasta_uploads_criada
+
+
+def _persistir_upload(arquivo, caminho_arquivo: str):
+    """Grava o upload em arquivo temporário e o renomeia ao final (nunca expõe arquivo parcial)"""
+    caminho_parcial = caminho_arquivo + '.parcial'
+    try:
+        # save() copia o stream em blocos, sem carregar o arquivo inteiro
+        arquivo.save(caminho_parcial)
+        os.replace(caminho_parcial, caminho_arquivo)
+    except OSError:
+        if os.path.exists(caminho_parcial):
+            os.remove(caminho_parcial)
+        raise
+
+
+# Consultas independentes de uma mesma página executadas em paralelo
+_executor_consultas = ThreadPoolExecutor(max_workers=8, thread_name_prefix='consulta')
+
+
+def _executar_com_contexto(app, funcao, *args):
+    """Executa `funcao` em um contexto de aplicação próprio (sessão própria do pool)"""
+    with app.app_context():
+        return funcao(*args)
+
 
 @routes.route('/')
 def inicio():
@@ -36,19 +80,8 @@ def listar_reservas():
     try:
         reservas_data = reserva_service.listar_reservas_futuras()
         
-        # Converter para objetos compatíveis com template
-        reservas = []
-        for reserva_dict in reservas_data:
-            # Criar um objeto simples que tem o método to_dict
-            class ReservaView:
-                def __init__(self, data):
-                    for key, value in data.items():
-                        setattr(self, key, value)
-                
-                def to_dict(self):
-                    return reserva_dict
-            
-            reservas.append(ReservaView(reserva_dict))
+        # Converter para objetos compatíveis com template (atributos + to_dict)
+        reservas = [SimpleNamespace(**d, to_dict=(lambda d=d: d)) for d in reservas_data]
         
         return render_template('lista_reservas.html', reservas=reservas)
     except Exception as e:
@@ -70,9 +103,12 @@ def verificar_disponibilidade():
             'mensagem': 'Parâmetros obrigatórios: data, horario_inicio, horario_fim'
         }), 400
     
+    # Horários ocupados do dia apenas sob pedido (ou quando há conflito)
+    incluir_ocupados = request.args.get('incluir_ocupados', '') in ('1', 'true')
+    
     try:
         resultado = reserva_service.verificar_disponibilidade(
-            data_str, horario_inicio_str, horario_fim_str
+            data_str, horario_inicio_str, horario_fim_str, incluir_ocupados
         )
         return jsonify(resultado)
         
@@ -83,6 +119,20 @@ def verificar_disponibilidade():
         }), 500
 
 
+@routes.route('/api/horarios-ocupados')
+def api_horarios_ocupados():
+    """API para listar os horários já ocupados em uma data"""
+    data_str = request.args.get('data')
+    if not data_str:
+        return jsonify({'sucesso': False, 'mensagem': 'Parâmetro obrigatório: data'}), 400
+    
+    try:
+        resultado = reserva_service.obter_horarios_ocupados(data_str)
+        return jsonify(resultado), (200 if resultado['sucesso'] else 400)
+    except Exception as e:
+        return jsonify({'sucesso': False, 'mensagem': f'Erro interno: {str(e)}'}), 500
+
+
 @routes.route('/api/criar-reserva', methods=['POST'])
 def criar_reserva():
     """API para criar nova reserva"""
@@ -146,15 +196,19 @@ def obter_estatisticas():
         }), 500
 
 
+# Quantidade máxima de reservas detalhadas em /testar-bd
+_LIMITE_DETALHES_TESTE_BD = 20
+
+
 @routes.route('/testar-bd')
 def testar_bd():
     """Rota para testar o banco de dados"""
     try:
-        # Buscar todas as reservas existentes usando o modelo SQLAlchemy
-        reservas = Reserva.query.all()
+        # Contar as reservas existentes sem carregar os objetos
+        total_reservas = db.session.query(func.count(Reserva.id)).scalar()
         
         # Se não há reservas, criar uma de teste
-        if len(reservas) == 0:
+        if total_reservas == 0:
             reserva_teste = Reserva(
                 nome="Maria Silva",
 
@@ -171,12 +225,16 @@ def testar_bd():
             
             return "Banco funcionando! Reserva de teste criada com sucesso!"
         else:
-            detalhes = "<br>".join([
-                f"• {r.nome} - {r.data_reserva.strftime('%d/%m/%Y')} "
-                f"das {r.horario_inicio} às {r.horario_fim}" 
+            # Detalhar apenas as primeiras reservas, com as colunas exibidas
+            reservas = Reserva.query.with_entities(
+                Reserva.nome, Reserva.data_reserva, Reserva.horario_inicio, Reserva.horario_fim
+            ).order_by(Reserva.id).limit(_LIMITE_DETALHES_TESTE_BD).all()
+            detalhes = "<br>".join(
+                f"• {r.nome} - {r.data_reserva:%d/%m/%Y} "
+                f"das {r.horario_inicio} às {r.horario_fim}"
                 for r in reservas
-            ])
-            return f"Banco funcionando! Total de reservas: {len(reservas)}<br><br><strong>Reservas:</strong><br>{detalhes}"
+            )
+            return f"Banco funcionando! Total de reservas: {total_reservas}<br><br><strong>Reservas:</strong><br>{detalhes}"
         
     except Exception as e:
         return f"Erro no banco: {str(e)}"
@@ -260,6 +318,28 @@ def criar_associado():
         }), 500
 
 
+@routes.route('/api/associado/validar-cpfs', methods=['POST'])
+def api_validar_cpfs():
+    """API para validar vários CPFs de uma vez (pré-checagem de importação)"""
+    try:
+        dados = request.get_json(silent=True) or {}
+        cpfs = dados.get('cpfs')
+        
+        if not isinstance(cpfs, list) or not all(isinstance(cpf, str) for cpf in cpfs):
+            return jsonify({
+                'sucesso': False,
+                'mensagem': 'Informe "cpfs" como uma lista de textos'
+            }), 400
+        
+        return jsonify({'sucesso': True, 'cpfs': associado_service.validar_cpfs(cpfs)})
+        
+    except Exception as e:
+        return jsonify({
+            'sucesso': False,
+            'mensagem': f'Erro interno do servidor: {str(e)}'
+        }), 500
+
+
 @routes.route('/api/associado/verificar/<cpf>')
 def verificar_associado(cpf):
     """API para verificar status de associado"""
@@ -272,7 +352,7 @@ def verificar_associado(cpf):
                 'mensagem': 'CPF não encontrado no cadastro de associados'
             }), 404
         
-        adimplente, mensagem = associado_service.verificar_adimplencia(cpf)
+        adimplente, mensagem = associado_service.verificar_adimplencia_dict(associado)
         
         return jsonify({
             'encontrado': True,
@@ -386,21 +466,31 @@ def confirmar_pagamento_taxa_old():
 def minha_conta(cpf):
     """Página da conta do associado"""
     try:
+        app = current_app._get_current_object()
+        
+        # Taxas e boletins não dependem do associado: disparados em paralelo,
+        # cada um com sua sessão, enquanto o associado é buscado nesta thread
+        # (dois lugares do executor por página, e o cache da requisição vale)
+        futuro_taxas = _executor_consultas.submit(
+            _executar_com_contexto, app, taxa_service.listar_por_associado, cpf)
+        futuro_boletins = _executor_consultas.submit(
+            _executar_com_contexto, app, boletim_service.listar_boletins_ativos, cpf)
+        
         # Buscar dados do associado
         associado = associado_service.buscar_por_cpf(cpf)
         
         if not associado:
+            # Consultas que ainda não começaram não precisam mais rodar
+            futuro_taxas.cancel()
+            futuro_boletins.cancel()
             return render_template('erro.html', 
                                  mensagem="CPF não encontrado no sistema"), 404
         
         # Buscar reservas do associado
         # TODO: Implementar método no reserva_service para buscar por CPF
         
-        # Buscar taxas do associado
-        taxas = taxa_service.listar_por_associado(cpf)
-        
-        # Buscar boletins para o associado
-        boletins = boletim_service.listar_boletins_ativos(cpf)
+        taxas = futuro_taxas.result()
+        boletins = futuro_boletins.result()
         
         return render_template('minha_conta.html', 
                              associado=associado,
@@ -482,17 +572,7 @@ def api_listar_associados():
         status = request.args.get('status', '')  # adimplente, inadimplente
         busca = request.args.get('busca', '')    # busca por nome/cpf
         
-        associados = associado_service.listar_todos()
-        
-        # Aplicar filtros se necessário
-        if status:
-            associados = [a for a in associados if a.get('status_adimplencia') == status]
-        
-        if busca:
-            busca_lower = busca.lower()
-            associados = [a for a in associados 
-                         if busca_lower in a.get('nome', '').lower() or 
-                            busca_lower in a.get('cpf', '')]
+        associados = associado_service.buscar(status=status or None, termo=busca or None)
         
         return jsonify({'sucesso': True, 'associados': associados})
     except Exception as e:
@@ -505,8 +585,10 @@ def api_estatisticas_associados():
     try:
         associados = associado_service.listar_todos()
         
+        # Contagem por status em uma única passada
+        por_status = Counter(a.get('status_adimplencia') for a in associados)
         total = len(associados)
-        adimplentes = len([a for a in associados if a.get('status_adimplencia') == 'adimplente'])
+        adimplentes = por_status.get('adimplente', 0)
         inadimplentes = total - adimplentes
         
         stats = {
@@ -542,18 +624,31 @@ def api_confirmar_pagamento_taxa():
 def api_estatisticas_taxas():
     """API para obter estatísticas de taxas"""
     try:
-        # Buscar todas as taxas (implementação combinada)
-        taxas_pendentes = taxa_service.listar_taxas_pendentes()
-        taxas_vencidas = taxa_service.listar_taxas_vencidas()
-        todas_taxas = taxas_pendentes + taxas_vencidas
-        
-        total_taxas = len(todas_taxas)
-        pagas = len([t for t in todas_taxas if t.get('status') == 'pago'])
-        pendentes = len([t for t in todas_taxas if t.get('status') == 'pendente'])
-        vencidas = len([t for t in todas_taxas if t.get('status') == 'vencido'])
-        
-        valor_total = sum(t.get('valor', 0) for t in todas_taxas)
-        valor_arrecadado = sum(t.get('valor', 0) for t in todas_taxas if t.get('status') == 'pago')
+        # Uma única agregação por status no banco, sem materializar as taxas.
+        # Pendentes com vencimento passado contam como vencidas, como na
+        # listagem de taxas vencidas.
+        atrasada = Taxa.data_vencimento < relogio.hoje()
+        linhas = db.session.query(
+            Taxa.status,
+            atrasada,
+            func.count(Taxa.id),
+            func.coalesce(func.sum(Taxa.valor), 0)
+        ).group_by(Taxa.status, atrasada).all()
+        
+        por_status = {}
+        for status, vencida, quantidade, valor in linhas:
+            if status == 'pendente' and vencida:
+                status = 'vencido'
+            qtd_atual, valor_atual = por_status.get(status, (0, 0.0))
+            por_status[status] = (qtd_atual + quantidade, valor_atual + float(valor))
+        
+        pagas, valor_arrecadado = por_status.get('pago', (0, 0.0))
+        pendentes, valor_pendentes = por_status.get('pendente', (0, 0.0))
+        vencidas, valor_vencidas = por_status.get('vencido', (0, 0.0))
+        
+        # Taxas canceladas não entram nos totais
+        total_taxas = pagas + pendentes + vencidas
+        valor_total = valor_arrecadado + valor_pendentes + valor_vencidas
         
         stats = {
             'total_taxas': total_taxas,
@@ -583,27 +678,23 @@ def api_upload_midia():
             return jsonify({'sucesso': False, 'mensagem': 'Nenhum arquivo selecionado'}), 400
         
         # Verificar tipo de arquivo
-        tipos_permitidos = {'png', 'jpg', 'jpeg', 'gif', 'pdf', 'doc', 'docx'}
         filename = arquivo.filename or ''
-        extensao = filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+        _, ponto, extensao = filename.rpartition('.')
+        extensao = extensao.lower() if ponto else ''
         
-        if extensao not in tipos_permitidos:
+        if extensao not in _TIPOS_UPLOAD_PERMITIDOS:
             return jsonify({'sucesso': False, 'mensagem': 'Tipo de arquivo não permitido'}), 400
         
         # Salvar arquivo (implementação simplificada)
-        from datetime import datetime
-        import os
-        
         # Criar nome único para o arquivo
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         nome_arquivo = f"{timestamp}_{arquivo.filename}"
         
-        # Definir caminho (criar pasta se não existir)
-        upload_path = os.path.join(os.getcwd(), 'static', 'uploads')
-        os.makedirs(upload_path, exist_ok=True)
+        # Definir caminho (pasta criada no primeiro upload)
+        upload_path = _pasta_uploads()
         
         caminho_arquivo = os.path.join(upload_path, nome_arquivo)
-        arquivo.save(caminho_arquivo)
+        _persistir_upload(arquivo, caminho_arquivo)
         
         # Retornar URL relativa
         url_arquivo = f"/static/uploads/{nome_arquivo}"
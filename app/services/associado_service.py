@@ -1,6 +1,14 @@
-from typing import Dict, List, Optional, Tuple
-from datetime import datetime, date
-from app.models import db, Associado
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from datetime import date
+from flask import g, has_request_context
+from app.models import db, Associado, STATUS_ADIMPLENCIA
+from app.entities.associado import validar_cpfs_em_lote
+from app.entities.formatacao import ler_data
+
+
+# Padrão pré-compilado para remover a formatação do CPF
+_CPF_CLEAN_RE = re.compile(r'[^\d]')
 
 
 class AssociadoService:
@@ -14,17 +22,29 @@ class AssociadoService:
         # Limpar CPF
         cpf_limpo = self._limpar_cpf(cpf)
         
+        # CPF gravado sempre tem 11 dígitos: nada a consultar para os demais
+        if len(cpf_limpo) != 11:
+            return None
+        
+        cache = self._cache_requisicao()
+        chave = ('assoc_cpf', cpf_limpo)
+        if cache is not None and chave in cache:
+            return cache[chave]
+        
         associado = Associado.query.filter_by(cpf=cpf_limpo).first()
+        resultado = associado.to_dict() if associado else None
         
-        if associado:
-            return associado.to_dict()
+        if cache is not None:
+            cache[chave] = resultado
         
-        return None
+        return resultado
     
     def verificar_adimplencia(self, cpf: str) -> Tuple[bool, str]:
         """Verifica se associado está adimplente"""
-        associado = self.buscar_por_cpf(cpf)
-        
+        return self.verificar_adimplencia_dict(self.buscar_por_cpf(cpf))
+    
+    def verificar_adimplencia_dict(self, associado: Optional[Dict]) -> Tuple[bool, str]:
+        """Verifica a adimplência a partir do associado já buscado (sem nova consulta)"""
         if not associado:
             return False, "CPF não encontrado no cadastro de associados"
         
@@ -56,8 +76,9 @@ class AssociadoService:
                     'mensagem': 'CPF já cadastrado no sistema'
                 }
             
-            # Verificar se email já existe
-            email_existe = Associado.query.filter_by(email=dados['email']).first()
+            # Verificar se email já existe (gravado sempre normalizado)
+            email_normalizado = self._normalizar_email(dados['email'])
+            email_existe = Associado.query.filter_by(email=email_normalizado).first()
             if email_existe:
                 return {
                     'sucesso': False,
@@ -71,7 +92,7 @@ class AssociadoService:
                     # Converter string para date
                     data_str = dados['data_ultimo_pagamento']
                     if isinstance(data_str, str):
-                        data_ultimo_pagamento = datetime.strptime(data_str, '%Y-%m-%d').date()
+                        data_ultimo_pagamento = ler_data(data_str)
                     elif isinstance(data_str, date):
                         data_ultimo_pagamento = data_str
                 except ValueError:
@@ -81,7 +102,7 @@ class AssociadoService:
             novo_associado = Associado(
                 cpf=cpf_limpo,
                 nome=dados['nome'].strip(),
-                email=dados['email'].strip(),
+                email=email_normalizado,
                 telefone=dados.get('telefone', '').strip() or None,
                 status_adimplencia=dados.get('status_adimplencia', 'adimplente'),
                 data_ultimo_pagamento=data_ultimo_pagamento
@@ -89,6 +110,7 @@ class AssociadoService:
             
             db.session.add(novo_associado)
             db.session.commit()
+            self._invalidar_cache_requisicao()
             
             return {
                 'sucesso': True,
@@ -121,6 +143,7 @@ class AssociadoService:
                 associado.data_ultimo_pagamento = data_pagamento
             
             db.session.commit()
+            self._invalidar_cache_requisicao()
             
             return {
                 'sucesso': True,
@@ -137,7 +160,8 @@ class AssociadoService:
     
     def listar_inadimplentes(self) -> List[Dict]:
         """Lista todos os associados inadimplentes"""
-        associados = Associado.query.filter_by(
+        # Listagens serializam só colunas do associado; raiseload barra N+1 acidental
+        associados = Associado.query.options(db.raiseload('*')).filter_by(
             status_adimplencia='inadimplente',
             ativo=True
         ).all()
@@ -146,27 +170,139 @@ class AssociadoService:
     
     def listar_todos(self, apenas_ativos: bool = True) -> List[Dict]:
         """Lista todos os associados"""
-        query = Associado.query
+        cache = self._cache_requisicao()
+        chave = ('assoc_all', apenas_ativos)
+        if cache is not None and chave in cache:
+            return cache[chave]
+        
+        # to_dict usa todas as colunas (load_only só geraria cargas lazy);
+        # relacionamentos nunca são lidos na listagem
+        query = Associado.query.options(db.raiseload('*'))
         
         if apenas_ativos:
             query = query.filter_by(ativo=True)
         
         associados = query.all()
-        return [associado.to_dict() for associado in associados]
+        resultado = [associado.to_dict() for associado in associados]
+        
+        if cache is not None:
+            cache[chave] = resultado
+        
+        return resultado
+    
+    def buscar(self, status: Optional[str] = None, termo: Optional[str] = None,
+               limite: Optional[int] = None) -> List[Dict]:
+        """
+        Lista associados ativos filtrando por status e por trecho do nome/CPF.
+        
+        Os filtros são aplicados na consulta, trazendo do banco apenas os
+        associados que serão devolvidos.
+        """
+        if status and status not in STATUS_ADIMPLENCIA.valores:
+            return []
+        
+        query = Associado.query.options(db.raiseload('*')).filter_by(ativo=True)
+        
+        if status:
+            query = query.filter_by(status_adimplencia=status)
+        
+        if termo:
+            # Escapar curingas: o termo é buscado literalmente
+            termo_escapado = termo.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            padrao = f'%{termo_escapado}%'
+            # O lower nativo do SQLite só trata ASCII: app.py registra
+            # unicode_lower (regra do Python) para os nomes acentuados
+            if db.session.get_bind().dialect.name == 'sqlite':
+                nome_minusculo = db.func.unicode_lower(Associado.nome)
+            else:
+                nome_minusculo = db.func.lower(Associado.nome)
+            query = query.filter(db.or_(
+                nome_minusculo.like(padrao.lower(), escape='\\'),
+                Associado.cpf.like(padrao, escape='\\')
+            ))
+        
+        if limite:
+            query = query.limit(limite)
+        
+        return [associado.to_dict() for associado in query.all()]
     
     def buscar_por_email(self, email: str) -> Optional[Dict]:
         """Busca associado por email"""
-        associado = Associado.query.filter_by(email=email.strip()).first()
+        associado = Associado.query.filter_by(email=self._normalizar_email(email)).first()
         
         if associado:
             return associado.to_dict()
         
         return None
     
+    def existem_associados(self, cpfs: Iterable[str]) -> Set[str]:
+        """
+        Retorna, entre os CPFs informados, os que estão cadastrados.
+        
+        Usa uma única consulta IN, para importações e criação em lote
+        separarem CPFs válidos e desconhecidos sem um SELECT por registro.
+        """
+        cpfs_limpos = {self._limpar_cpf(cpf) for cpf in cpfs}
+        if not cpfs_limpos:
+            return set()
+        
+        linhas = db.session.query(Associado.cpf).filter(Associado.cpf.in_(cpfs_limpos)).all()
+        return {cpf for (cpf,) in linhas}
+    
+    def validar_cpfs(self, cpfs: Iterable[str]) -> List[Dict]:
+        """
+        Valida uma lista de CPFs de uma vez (ex.: pré-checagem de importação).
+        
+        Os dígitos verificadores são calculados em lote e o cadastro é
+        consultado com um único IN para os CPFs válidos.
+        """
+        cpfs_limpos = [self._limpar_cpf(cpf) for cpf in cpfs]
+        validos = validar_cpfs_em_lote(cpfs_limpos)
+        cadastrados = self.existem_associados(
+            cpf for cpf, valido in zip(cpfs_limpos, validos) if valido
+        )
+        
+        resultado = []
+        for cpf, valido in zip(cpfs_limpos, validos):
+            if valido:
+                mensagem = 'CPF válido'
+            elif len(cpf) != 11:
+                mensagem = 'CPF deve ter 11 dígitos'
+            else:
+                mensagem = 'CPF inválido'
+            resultado.append({
+                'cpf': cpf,
+                'valido': valido,
+                'mensagem': mensagem,
+                'cadastrado': cpf in cadastrados
+            })
+        return resultado
+    
+    def _cache_requisicao(self) -> Optional[Dict]:
+        """
+        Cache de consultas válido apenas durante a requisição atual (flask.g).
+        
+        Fora de um contexto de requisição (scripts, CLI) retorna None e as
+        consultas vão sempre ao banco.
+        """
+        if not has_request_context():
+            return None
+        if not hasattr(g, '_cache_associados'):
+            g._cache_associados = {}
+        return g._cache_associados
+    
+    def _invalidar_cache_requisicao(self):
+        """Descarta o cache da requisição após alterações nos associados"""
+        if has_request_context():
+            g.pop('_cache_associados', None)
+    
+    def _normalizar_email(self, email: str) -> str:
+        """Email sem espaços nas pontas e em minúsculas, como é gravado"""
+        return email.strip().lower()
+    
     def _limpar_cpf(self, cpf: str) -> str:
         """Remove formatação do CPF"""
-        import re
-        return re.sub(r'[^\d]', '', cpf)
+        return _CPF_CLEAN_RE.sub('', cpf)
     
     def desativar_associado(self, cpf: str, motivo: str = None) -> Dict:
         """Desativa um associado"""
@@ -187,6 +323,7 @@ class AssociadoService:
                 pass
             
             db.session.commit()
+            self._invalidar_cache_requisicao()
             
             return {
                 'sucesso': True,
@@ -1,13 +1,55 @@
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, date, timedelta
+from time import monotonic
 from app.models import db, Boletim, Associado
+from app import relogio
+from app.entities.formatacao import ler_data_hora
+
+
+# Validade (segundos) das listagens de boletins memorizadas (ativos e urgentes)
+_BOLETINS_TTL_S = 60
+
+# Critério SQL de urgência (espelha Boletim.is_urgente), montado uma única vez
+_CONDICAO_URGENTE = db.or_(
+    Boletim.prioridade.in_(('alta', 'critica')),
+    Boletim.tipo == 'urgente'
+)
+
+
+# Campos editáveis em atualizar_boletim (os de texto são aparados)
+_CAMPOS_TEXTO_EDITAVEIS = ('titulo', 'conteudo')
+_CAMPOS_SIMPLES_EDITAVEIS = ('tipo', 'prioridade', 'destinatarios')
+
+# Boletins automáticos ligados a reservas; '{data}' é preenchido na criação
+_TEMPLATES_AUTOMATICOS = {
+    'churrasqueira_disponivel': {
+        'titulo': 'Churrasqueira Disponível para Reserva',
+        'conteudo': 'A churrasqueira está disponível para reserva. Faça já a sua reserva pelo sistema online.',
+        'tipo': 'comunicado',
+        'prioridade': 'normal'
+    },
+    'manutencao_programada': {
+        'titulo': 'Manutenção Programada da Churrasqueira',
+        'conteudo': 'A churrasqueira estará indisponível para manutenção no dia {data}. Pedimos compreensão.',
+        'tipo': 'comunicado',
+        'prioridade': 'alta'
+    },
+    'lembrete_pagamento': {
+        'titulo': 'Lembrete: Taxa Sindical',
+        'conteudo': 'Lembramos que a taxa sindical deve estar em dia para fazer reservas da churrasqueira.',
+        'tipo': 'comunicado',
+        'prioridade': 'normal',
+        'destinatarios': 'inadimplentes'
+    }
+}
 
 
 class BoletimService:
     """Serviço para gerenciamento de boletins informativos"""
     
     def __init__(self):
-        pass
+        # listagem -> (expira_em, boletins); esvaziado em qualquer alteração de boletins
+        self._cache_listagens: Dict[str, Tuple[float, List[Dict]]] = {}
     
     def criar_boletim(self, dados: Dict) -> Dict:
         """Cria novo boletim informativo"""
@@ -23,7 +65,7 @@ class BoletimService:
             data_expiracao = None
             if dados.get('data_expiracao'):
                 try:
-                    data_expiracao = datetime.strptime(dados['data_expiracao'], '%Y-%m-%d %H:%M')
+                    data_expiracao = ler_data_hora(dados['data_expiracao'])
                 except ValueError:
                     return {
                         'sucesso': False,
@@ -43,6 +85,7 @@ class BoletimService:
             
             db.session.add(novo_boletim)
             db.session.commit()
+            self._cache_listagens.clear()
             
             return {
                 'sucesso': True,
@@ -59,30 +102,39 @@ class BoletimService:
     
     def listar_boletins_ativos(self, cpf_associado: Optional[str] = None) -> List[Dict]:
         """Lista boletins ativos, opcionalmente filtrados para um associado específico"""
-        # Buscar boletins ativos
-        boletins = Boletim.query.filter_by(ativo=True).order_by(
-            Boletim.prioridade.desc(),
-            Boletim.data_publicacao.desc()
-        ).all()
+        boletins_validos = self._ler_cache('ativos')
         
-        # Filtrar boletins válidos (não expirados)
-        boletins_validos = [b for b in boletins if b.is_ativo()]
+        if boletins_validos is None:
+            # Buscar boletins ativos e não expirados, com um único instante de referência
+            agora = relogio.agora_utc()
+            # Boletim não tem relacionamentos; raiseload barra N+1 caso surjam
+            boletins = Boletim.query.options(db.raiseload('*')).filter(
+                Boletim.ativo == True,
+                self._nao_expirado(agora)
+            ).order_by(
+                Boletim.prioridade.desc(),
+                Boletim.data_publicacao.desc()
+            ).all()
+            
+            boletins_validos = self._gravar_cache('ativos', boletins, agora)
         
         # Se CPF fornecido, filtrar por destinatário
         if cpf_associado:
-            associado = Associado.query.filter_by(cpf=cpf_associado).first()
-            if associado:
-                status_adimplencia = associado.status_adimplencia
+            # Só o status importa para a regra de destinatários
+            status_adimplencia = db.session.query(Associado.status_adimplencia).filter_by(
+                cpf=cpf_associado
+            ).scalar()
+            if status_adimplencia is not None:
                 boletins_validos = [
                     b for b in boletins_validos 
-                    if b.deve_notificar_associado(status_adimplencia)
+                    if Boletim.destinatarios_incluem(b['destinatarios'], status_adimplencia)
                 ]
         
-        return [boletim.to_dict() for boletim in boletins_validos]
+        return boletins_validos
     
     def buscar_por_id(self, boletim_id: int) -> Optional[Dict]:
         """Busca boletim por ID"""
-        boletim = Boletim.query.get(boletim_id)
+        boletim = db.session.get(Boletim, boletim_id)
         
         if boletim:
             return boletim.to_dict()
@@ -92,7 +144,7 @@ class BoletimService:
     def atualizar_boletim(self, boletim_id: int, dados: Dict) -> Dict:
         """Atualiza boletim existente"""
         try:
-            boletim = Boletim.query.get(boletim_id)
+            boletim = db.session.get(Boletim, boletim_id)
             
             if not boletim:
                 return {
@@ -101,20 +153,15 @@ class BoletimService:
                 }
             
             # Atualizar campos se fornecidos
-            if dados.get('titulo'):
-                boletim.titulo = dados['titulo'].strip()
-            
-            if dados.get('conteudo'):
-                boletim.conteudo = dados['conteudo'].strip()
-            
-            if dados.get('tipo'):
-                boletim.tipo = dados['tipo']
+            for campo in _CAMPOS_TEXTO_EDITAVEIS:
+                valor = dados.get(campo)
+                if valor:
+                    setattr(boletim, campo, valor.strip())
             
-            if dados.get('prioridade'):
-                boletim.prioridade = dados['prioridade']
-            
-            if dados.get('destinatarios'):
-                boletim.destinatarios = dados['destinatarios']
+            for campo in _CAMPOS_SIMPLES_EDITAVEIS:
+                valor = dados.get(campo)
+                if valor:
+                    setattr(boletim, campo, valor)
             
             if 'ativo' in dados:
                 boletim.ativo = bool(dados['ativo'])
@@ -122,7 +169,7 @@ class BoletimService:
             # Processar data de expiração
             if dados.get('data_expiracao'):
                 try:
-                    boletim.data_expiracao = datetime.strptime(dados['data_expiracao'], '%Y-%m-%d %H:%M')
+                    boletim.data_expiracao = ler_data_hora(dados['data_expiracao'])
                 except ValueError:
                     return {
                         'sucesso': False,
@@ -130,6 +177,7 @@ class BoletimService:
                     }
             
             db.session.commit()
+            self._cache_listagens.clear()
             
             return {
                 'sucesso': True,
@@ -147,7 +195,7 @@ class BoletimService:
     def desativar_boletim(self, boletim_id: int) -> Dict:
         """Desativa um boletim"""
         try:
-            boletim = Boletim.query.get(boletim_id)
+            boletim = db.session.get(Boletim, boletim_id)
             
             if not boletim:
                 return {
@@ -157,6 +205,7 @@ class BoletimService:
             
             boletim.ativo = False
             db.session.commit()
+            self._cache_listagens.clear()
             
             return {
                 'sucesso': True,
@@ -171,71 +220,79 @@ class BoletimService:
             }
     
     def listar_boletins_urgentes(self) -> List[Dict]:
-        """Lista apenas boletins urgentes ativos"""
+        """Lista apenas boletins urgentes ativos (memorizados por alguns segundos)"""
+        urgentes = self._ler_cache('urgentes')
+        if urgentes is not None:
+            return urgentes
+        
+        # Apenas os válidos (não expirados), filtrados na própria consulta
+        agora = relogio.agora_utc()
         boletins = Boletim.query.filter(
             Boletim.ativo == True,
-            db.or_(
-                Boletim.prioridade.in_(['alta', 'critica']),
-                Boletim.tipo == 'urgente'
-            )
+            self._nao_expirado(agora),
+            _CONDICAO_URGENTE
         ).order_by(Boletim.data_publicacao.desc()).all()
         
-        # Filtrar apenas os válidos (não expirados)
-        boletins_validos = [b for b in boletins if b.is_ativo()]
+        return self._gravar_cache('urgentes', boletins, agora)
+    
+    def _nao_expirado(self, agora: datetime):
+        """Critério SQL equivalente a Boletim.is_ativo quanto à expiração"""
+        return db.or_(Boletim.data_expiracao.is_(None), Boletim.data_expiracao >= agora)
+    
+    def _ler_cache(self, listagem: str) -> Optional[List[Dict]]:
+        """Retorna cópia da listagem memorizada, ou None se ausente/expirada"""
+        entrada = self._cache_listagens.get(listagem)
+        if entrada is None or monotonic() >= entrada[0]:
+            return None
+        return [dict(boletim) for boletim in entrada[1]]
+    
+    def _gravar_cache(self, listagem: str, boletins_validos: List[Boletim], agora: datetime) -> List[Dict]:
+        """Serializa os boletins, memoriza a listagem e devolve uma cópia"""
+        serializados = [boletim.to_dict(agora) for boletim in boletins_validos]
+        
+        # O cache não pode sobreviver à expiração do primeiro boletim listado
+        ttl = _BOLETINS_TTL_S
+        for boletim in boletins_validos:
+            if boletim.data_expiracao:
+                ttl = min(ttl, (boletim.data_expiracao - agora).total_seconds())
+        self._cache_listagens[listagem] = (monotonic() + ttl, serializados)
         
-        return [boletim.to_dict() for boletim in boletins_validos]
+        return [dict(boletim) for boletim in serializados]
     
     def criar_boletim_automatico_reserva(self, tipo_evento: str, detalhes: Dict) -> Dict:
         """Cria boletim automático relacionado a reservas"""
-        templates = {
-            'churrasqueira_disponivel': {
-                'titulo': 'Churrasqueira Disponível para Reserva',
-                'conteudo': 'A churrasqueira está disponível para reserva. Faça já a sua reserva pelo sistema online.',
-                'tipo': 'comunicado',
-                'prioridade': 'normal'
-            },
-            'manutencao_programada': {
-                'titulo': 'Manutenção Programada da Churrasqueira',
-                'conteudo': f"A churrasqueira estará indisponível para manutenção no dia {detalhes.get('data', 'a definir')}. Pedimos compreensão.",
-                'tipo': 'comunicado',
-                'prioridade': 'alta'
-            },
-            'lembrete_pagamento': {
-                'titulo': 'Lembrete: Taxa Sindical',
-                'conteudo': 'Lembramos que a taxa sindical deve estar em dia para fazer reservas da churrasqueira.',
-                'tipo': 'comunicado',
-                'prioridade': 'normal',
-                'destinatarios': 'inadimplentes'
-            }
-        }
-        
-        template = templates.get(tipo_evento)
+        template = _TEMPLATES_AUTOMATICOS.get(tipo_evento)
         if not template:
             return {
                 'sucesso': False,
                 'mensagem': 'Tipo de boletim automático não encontrado'
             }
         
+        # Só os templates com marcador precisam de cópia e interpolação
+        if '{data}' in template['conteudo']:
+            template = {**template, 'conteudo': template['conteudo'].format(data=detalhes.get('data', 'a definir'))}
+        
         return self.criar_boletim(template)
     
     def expirar_boletins_antigos(self) -> Dict:
         """Desativa automaticamente boletins expirados"""
         try:
-            agora = datetime.utcnow()
+            agora = relogio.agora_utc()
             
-            # Buscar boletins ativos com data de expiração passada
-            boletins_expirados = Boletim.query.filter(
-                Boletim.ativo == True,
-                Boletim.data_expiracao < agora
-            ).all()
-            
-            count = 0
-            for boletim in boletins_expirados:
-                boletim.ativo = False
-                count += 1
+            # Desativar boletins ativos com data de expiração passada em um
+            # único UPDATE, sem carregar cada boletim na sessão
+            resultado = db.session.execute(
+                db.update(Boletim).where(
+                    Boletim.ativo == True,
+                    Boletim.data_expiracao < agora
+                ).values(ativo=False),
+                execution_options={'synchronize_session': False}
+            )
+            count = resultado.rowcount
             
             if count > 0:
                 db.session.commit()
+                self._cache_listagens.clear()
             
             return {
                 'sucesso': True,
@@ -251,15 +308,14 @@ class BoletimService:
     
     def estatisticas(self) -> Dict:
         """Retorna estatísticas dos boletins"""
-        total_boletins = Boletim.query.count()
-        boletins_ativos = Boletim.query.filter_by(ativo=True).count()
-        boletins_urgentes = Boletim.query.filter(
-            Boletim.ativo == True,
-            db.or_(
-                Boletim.prioridade.in_(['alta', 'critica']),
-                Boletim.tipo == 'urgente'
-            )
-        ).count()
+        # Uma única passada com agregação condicional (em vez de três COUNTs)
+        ativo = Boletim.ativo == True
+        urgente = db.and_(ativo, _CONDICAO_URGENTE)
+        total_boletins, boletins_ativos, boletins_urgentes = db.session.query(
+            db.func.count(Boletim.id),
+            db.func.coalesce(db.func.sum(db.case((ativo, 1), else_=0)), 0),
+            db.func.coalesce(db.func.sum(db.case((urgente, 1), else_=0)), 0)
+        ).one()
         
         return {
             'total_boletins': total_boletins,
@@ -27,9 +27,11 @@ Versão: 1.0
 """
 
 from typing import Dict, List, Optional
-from datetime import datetime, date, time, timedelta
+from datetime import time, timedelta
 from app.interfaces.reserva_interfaces import IReservaRepository, IValidadorReserva
 from app.entities.reserva import Reserva as ReservaEntity
+from app.entities.formatacao import ler_data, ler_hora
+from app import relogio
 from app.services.associado_service import AssociadoService
 from app.services.taxa_service import TaxaService
 
@@ -60,18 +62,22 @@ class ReservaService:
     
     def __init__(self, 
                  repositorio: IReservaRepository, 
-                 validador: IValidadorReserva):
+                 validador: IValidadorReserva,
+                 associado_service: Optional[AssociadoService] = None,
+                 taxa_service: Optional[TaxaService] = None):
         """
         Inicializa o serviço de reservas com suas dependências.
         
         Args:
             repositorio: Implementação da interface de repositório de reservas
             validador: Implementação da interface de validação de reservas
+            associado_service: Serviço de associados compartilhado (novo se omitido)
+            taxa_service: Serviço de taxas compartilhado (novo se omitido)
         """
         self._repositorio = repositorio
         self._validador = validador
-        self._associado_service = AssociadoService()
-        self._taxa_service = TaxaService()
+        self._associado_service = associado_service or AssociadoService()
+        self._taxa_service = taxa_service or TaxaService()
     
     def criar_reserva(self, dados_reserva: Dict) -> Dict:
         """
@@ -143,9 +149,9 @@ class ReservaService:
         # 3. CONVERSÃO E VALIDAÇÃO TEMPORAL
         # Converte strings para objetos datetime para processamento
         try:
-            data_reserva = datetime.strptime(dados_reserva['data_reserva'], '%Y-%m-%d').date()
-            horario_inicio = datetime.strptime(dados_reserva['horario_inicio'], '%H:%M').time()
-            horario_fim = datetime.strptime(dados_reserva['horario_fim'], '%H:%M').time()
+            data_reserva = ler_data(dados_reserva['data_reserva'])
+            horario_inicio = ler_hora(dados_reserva['horario_inicio'])
+            horario_fim = ler_hora(dados_reserva['horario_fim'])
         except ValueError as e:
             return {
                 'sucesso': False,
@@ -170,17 +176,7 @@ class ReservaService:
                 'mensagem': mensagem_horario
             }
         
-        # 6. Verificar disponibilidade
-        disponivel, mensagem_disponibilidade = self._repositorio.verificar_disponibilidade(
-            data_reserva, horario_inicio, horario_fim
-        )
-        if not disponivel:
-            return {
-                'sucesso': False,
-                'mensagem': mensagem_disponibilidade
-            }
-        
-        # 7. Preparar dados para o repositório - incluindo CPF do associado
+        # 6. Preparar dados para o repositório - incluindo CPF do associado
         dados_para_criacao = {
             'nome': dados_reserva['nome'].strip(),
 
@@ -195,13 +191,13 @@ class ReservaService:
             'status': 'pendente'  # Reserva fica pendente até confirmação do pagamento
         }
         
-        # 8. Criar reserva
-        resultado_reserva = self._repositorio.criar_reserva(dados_para_criacao)
+        # 7. Verificar disponibilidade e criar reserva na mesma transação
+        resultado_reserva = self._repositorio.criar_reserva_atomica(dados_para_criacao)
         
         if not resultado_reserva['sucesso']:
             return resultado_reserva
         
-        # 9. Gerar taxa de reserva
+        # 8. Gerar taxa de reserva
         reserva_id = resultado_reserva['reserva']['id']
         if cpf_associado:
             resultado_taxa = self._taxa_service.gerar_taxa_reserva(reserva_id, cpf_associado)
@@ -213,7 +209,7 @@ class ReservaService:
             # Por ora, vamos manter a reserva mas informar sobre a taxa
             pass
         
-        # 10. Retornar resultado completo
+        # 9. Retornar resultado completo
         return {
             'sucesso': True,
             'mensagem': 'Reserva criada com sucesso. Taxa gerada - efetue o pagamento em até 24h.',
@@ -224,18 +220,24 @@ class ReservaService:
     
     def listar_reservas_futuras(self, dias_futuro: int = 30) -> List[Dict]:
         """Lista reservas ativas para os próximos dias"""
-        hoje = date.today()
+        hoje = relogio.hoje()
         data_limite = hoje + timedelta(days=dias_futuro)
         
         return self._repositorio.listar_reservas_ativas(hoje, data_limite)
     
-    def verificar_disponibilidade(self, data_str: str, horario_inicio_str: str, horario_fim_str: str) -> Dict:
-        """Verifica disponibilidade de um horário específico"""
+    def verificar_disponibilidade(self, data_str: str, horario_inicio_str: str, horario_fim_str: str,
+                                  incluir_ocupados: bool = False) -> Dict:
+        """
+        Verifica disponibilidade de um horário específico.
+        
+        Os horários ocupados do dia só são consultados quando há conflito ou
+        quando `incluir_ocupados` é solicitado.
+        """
         try:
             # Converter strings para objetos
-            data_reserva = datetime.strptime(data_str, '%Y-%m-%d').date()
-            horario_inicio = datetime.strptime(horario_inicio_str, '%H:%M').time()
-            horario_fim = datetime.strptime(horario_fim_str, '%H:%M').time()
+            data_reserva = ler_data(data_str)
+            horario_inicio = ler_hora(horario_inicio_str)
+            horario_fim = ler_hora(horario_fim_str)
             
             # Validar antecedência
             antecedencia_valida, mensagem_antecedencia = self._validador.validar_antecedencia(data_reserva)
@@ -261,7 +263,9 @@ class ReservaService:
             )
             
             # Obter horários ocupados para informação adicional
-            horarios_ocupados = self._repositorio.obter_horarios_ocupados(data_reserva)
+            horarios_ocupados = []
+            if incluir_ocupados or not disponivel:
+                horarios_ocupados = self._repositorio.obter_horarios_ocupados(data_reserva)
             
             return {
                 'disponivel': disponivel,
@@ -276,10 +280,34 @@ class ReservaService:
                 'horarios_ocupados': []
             }
     
+    def obter_horarios_ocupados(self, data_str: str) -> Dict:
+        """Lista os horários ocupados de uma data, sem verificar um horário específico"""
+        try:
+            data_reserva = ler_data(data_str)
+        except ValueError as e:
+            return {
+                'sucesso': False,
+                'mensagem': f'Formato de data inválido: {str(e)}',
+                'horarios_ocupados': []
+            }
+        
+        return {
+            'sucesso': True,
+            'horarios_ocupados': self._repositorio.obter_horarios_ocupados(data_reserva)
+        }
+    
     def cancelar_reserva(self, reserva_id: int, email_confirmacao: Optional[str] = None) -> Dict:
         """Cancela uma reserva com validações"""
         
-        # Buscar reserva
+        # Caminho comum: status, prazo de 24h e email conferidos no próprio UPDATE
+        agora = relogio.agora()
+        if self._repositorio.cancelar_se_elegivel(reserva_id, agora + timedelta(hours=24), email_confirmacao):
+            return {
+                'sucesso': True,
+                'mensagem': 'Reserva cancelada com sucesso'
+            }
+        
+        # Não cancelou: buscar a reserva apenas para explicar o motivo
         reserva_data = self._repositorio.buscar_por_id(reserva_id)
         if not reserva_data:
             return {
@@ -296,11 +324,7 @@ class ReservaService:
         
         # Verificar se pode ser cancelada (24h de antecedência)
         try:
-            data_reserva = datetime.strptime(reserva_data['data_reserva_iso'], '%Y-%m-%d').date()
-            horario_inicio = datetime.strptime(reserva_data['horario_inicio'], '%H:%M').time()
-            
-            agora = datetime.now()
-            data_hora_reserva = datetime.combine(data_reserva, horario_inicio)
+            data_hora_reserva = reserva_data['_inicio']
             
             if data_hora_reserva <= agora:
                 return {
@@ -329,19 +353,11 @@ class ReservaService:
                     'mensagem': 'Email de confirmação não confere com o da reserva'
                 }
         
-        # Cancelar no repositório
-        cancelada = self._repositorio.cancelar_reserva(reserva_id)
-        
-        if cancelada:
-            return {
-                'sucesso': True,
-                'mensagem': 'Reserva cancelada com sucesso'
-            }
-        else:
-            return {
-                'sucesso': False,
-                'mensagem': 'Erro ao cancelar reserva'
-            }
+        # Elegível, mas o UPDATE não a alterou (ex.: cancelada em paralelo)
+        return {
+            'sucesso': False,
+            'mensagem': 'Erro ao cancelar reserva'
+        }
     
     def obter_estatisticas(self) -> Dict:
         """Obtém estatísticas das reservas"""
@@ -352,6 +368,7 @@ class ReservaService:
         reserva = self._repositorio.buscar_por_id(reserva_id)
         
         if reserva:
+            reserva.pop('_inicio', None)
             return {
                 'sucesso': True,
                 'reserva': reserva
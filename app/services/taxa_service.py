@@ -1,24 +1,28 @@
+from collections import Counter
 from typing import Dict, List, Optional, Tuple
-from datetime import datetime, date, timedelta
+from datetime import datetime, date, time, timedelta
 from decimal import Decimal
 from app.models import db, Taxa
+from app import relogio
 from config import Config
 
 
 class TaxaService:
     """Serviço para gerenciamento de taxas de reserva"""
     
-    def __init__(self):
-        self.config = Config()
+    def __init__(self, config: Optional[Config] = None):
+        self.config = config or Config()
+        # Valor e prazo da taxa de reserva convertidos uma única vez
+        self._valor_taxa_reserva = Decimal(str(self.config.TAXA_RESERVA['valor']))
+        self._prazo_taxa_reserva = timedelta(hours=self.config.TAXA_RESERVA['prazo_pagamento_horas'])
     
     def gerar_taxa_reserva(self, reserva_id: int, cpf_associado: str) -> Dict:
         """Gera uma nova taxa de reserva"""
         try:
-            # Verificar se já existe taxa para esta reserva
-            taxa_existente = Taxa.query.filter_by(
-                reserva_id=reserva_id,
-                tipo='reserva'
-            ).first()
+            # Verificar se já existe taxa para esta reserva (EXISTS, sem carregar a taxa)
+            taxa_existente = db.session.query(
+                Taxa.query.filter_by(reserva_id=reserva_id, tipo='reserva').exists()
+            ).scalar()
             
             if taxa_existente:
                 return {
@@ -28,10 +32,10 @@ class TaxaService:
             
             # Criar nova taxa
             nova_taxa = Taxa(
-                valor=Decimal(str(self.config.TAXA_RESERVA['valor'])),
+                valor=self._valor_taxa_reserva,
                 tipo='reserva',
                 status='pendente',
-                data_vencimento=date.today() + timedelta(days=1),  # 24h para pagamento
+                data_vencimento=relogio.hoje() + self._prazo_taxa_reserva,  # prazo para pagamento
                 reserva_id=reserva_id,
                 associado_cpf=cpf_associado
             )
@@ -58,7 +62,7 @@ class TaxaService:
     def confirmar_pagamento(self, taxa_id: int, codigo_transacao: Optional[str] = None) -> Dict:
         """Confirma o pagamento de uma taxa"""
         try:
-            taxa = Taxa.query.get(taxa_id)
+            taxa = db.session.get(Taxa, taxa_id)
             
             if not taxa:
                 return {
@@ -75,7 +79,7 @@ class TaxaService:
             
             # Marcar como paga
             taxa.marcar_como_paga(
-                data_pagamento=datetime.utcnow(),
+                data_pagamento=relogio.agora_utc(),
                 codigo_transacao=codigo_transacao
             )
             
@@ -96,7 +100,7 @@ class TaxaService:
     
     def buscar_por_codigo(self, codigo_pagamento: str) -> Optional[Dict]:
         """Busca taxa por código de pagamento"""
-        taxa = Taxa.query.filter_by(codigo_pagamento=codigo_pagamento).first()
+        taxa = Taxa.query.options(db.raiseload('*')).filter_by(codigo_pagamento=codigo_pagamento).first()
         
         if taxa:
             return taxa.to_dict()
@@ -105,7 +109,8 @@ class TaxaService:
     
     def listar_taxas_pendentes(self, cpf_associado: Optional[str] = None) -> List[Dict]:
         """Lista taxas pendentes, opcionalmente filtradas por associado"""
-        query = Taxa.query.filter_by(status='pendente')
+        # Listagens serializam só colunas da taxa; raiseload barra N+1 acidental
+        query = Taxa.query.options(db.raiseload('*')).filter_by(status='pendente')
         
         if cpf_associado:
             query = query.filter_by(associado_cpf=cpf_associado)
@@ -115,28 +120,28 @@ class TaxaService:
     
     def listar_taxas_vencidas(self) -> List[Dict]:
         """Lista taxas vencidas"""
-        hoje = date.today()
-        
-        # Buscar taxas pendentes com data de vencimento passada
-        taxas_vencidas = Taxa.query.filter(
-            Taxa.status == 'pendente',
-            Taxa.data_vencimento < hoje
-        ).all()
-        
-        # Atualizar status para vencido
-        for taxa in taxas_vencidas:
-            taxa.marcar_como_vencida()
-        
-        if taxas_vencidas:
+        hoje = relogio.hoje()
+        
+        # Marcar como vencidas as pendentes com vencimento passado em um
+        # único UPDATE, sem carregar cada taxa na sessão
+        resultado = db.session.execute(
+            db.update(Taxa).where(
+                Taxa.status == 'pendente',
+                Taxa.data_vencimento < hoje
+            ).values(status='vencido'),
+            execution_options={'synchronize_session': False}
+        )
+        
+        if resultado.rowcount > 0:
             db.session.commit()
         
         # Retornar todas as taxas vencidas
-        taxas_vencidas_todas = Taxa.query.filter_by(status='vencido').all()
+        taxas_vencidas_todas = Taxa.query.options(db.raiseload('*')).filter_by(status='vencido').all()
         return [taxa.to_dict() for taxa in taxas_vencidas_todas]
     
     def buscar_por_reserva(self, reserva_id: int) -> Optional[Dict]:
         """Busca taxa por ID da reserva"""
-        taxa = Taxa.query.filter_by(reserva_id=reserva_id, tipo='reserva').first()
+        taxa = Taxa.query.options(db.raiseload('*')).filter_by(reserva_id=reserva_id, tipo='reserva').first()
         
         if taxa:
             return taxa.to_dict()
@@ -146,7 +151,7 @@ class TaxaService:
     def cancelar_taxa(self, taxa_id: int, motivo: str) -> Dict:
         """Cancela uma taxa"""
         try:
-            taxa = Taxa.query.get(taxa_id)
+            taxa = db.session.get(Taxa, taxa_id)
             
             if not taxa:
                 return {
@@ -195,24 +200,35 @@ class TaxaService:
     
     def listar_por_associado(self, cpf_associado: str) -> List[Dict]:
         """Lista todas as taxas de um associado"""
-        taxas = Taxa.query.filter_by(associado_cpf=cpf_associado).all()
+        taxas = Taxa.query.options(db.raiseload('*')).filter_by(associado_cpf=cpf_associado).all()
         return [taxa.to_dict() for taxa in taxas]
     
     def relatorio_financeiro(self, data_inicio: Optional[date] = None, data_fim: Optional[date] = None) -> Dict:
         """Gera relatório financeiro das taxas"""
-        query = Taxa.query
-        
+        # Agregação feita no banco: no máximo uma linha por status
+        query = db.session.query(
+            Taxa.status,
+            db.func.count(Taxa.id),
+            db.func.coalesce(db.func.sum(Taxa.valor), 0)
+        )
+        
+        # Intervalo semiaberto [início, dia seguinte ao fim) sobre a própria
+        # coluna, permitindo o uso do índice de data_criacao
         if data_inicio:
-            query = query.filter(Taxa.data_criacao >= datetime.combine(data_inicio, datetime.min.time()))
+            query = query.filter(Taxa.data_criacao >= datetime.combine(data_inicio, time.min))
         
         if data_fim:
-            query = query.filter(Taxa.data_criacao <= datetime.combine(data_fim, datetime.max.time()))
+            query = query.filter(Taxa.data_criacao < datetime.combine(data_fim + timedelta(days=1), time.min))
         
-        taxas = query.all()
+        quantidades = Counter()
+        valores = {}
+        for status, quantidade, soma in query.group_by(Taxa.status):
+            quantidades[status] = quantidade
+            valores[status] = float(soma)
         
-        total_arrecadado = sum(float(taxa.valor) for taxa in taxas if taxa.status == 'pago')
-        total_pendente = sum(float(taxa.valor) for taxa in taxas if taxa.status == 'pendente')
-        total_vencido = sum(float(taxa.valor) for taxa in taxas if taxa.status == 'vencido')
+        total_arrecadado = valores.get('pago', 0)
+        total_pendente = valores.get('pendente', 0)
+        total_vencido = valores.get('vencido', 0)
         
         return {
             'periodo': {
@@ -226,9 +242,9 @@ class TaxaService:
                 'total_geral': total_arrecadado + total_pendente + total_vencido
             },
             'detalhes': {
-                'taxas_pagas': len([t for t in taxas if t.status == 'pago']),
-                'taxas_pendentes': len([t for t in taxas if t.status == 'pendente']),
-                'taxas_vencidas': len([t for t in taxas if t.status == 'vencido']),
-                'taxas_canceladas': len([t for t in taxas if t.status == 'cancelado'])
+                'taxas_pagas': quantidades['pago'],
+                'taxas_pendentes': quantidades['pendente'],
+                'taxas_vencidas': quantidades['vencido'],
+                'taxas_canceladas': quantidades['cancelado']
             }
         }
\ No newline at end of file
@@ -1,22 +1,48 @@
 import re
 from datetime import date, time, timedelta
+from functools import lru_cache
 from typing import Dict, Tuple, Optional
+from app.entities.associado import Associado
 from app.interfaces.reserva_interfaces import IValidadorReserva
+from app import relogio
 from config import Config
 
 
+# Padrões pré-compilados de nome e email
+_NOME_RE = re.compile(r'^[a-zA-ZÀ-ÿ\s]+$')
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+# Horário de funcionamento da churrasqueira (SINT-IFESGO)
+_ABERTURA = time(8, 0)
+_FECHAMENTO = time(18, 0)
+
+# Campos obrigatórios de uma reserva - incluindo CPF para SINT-IFESGO
+_CAMPOS_OBRIGATORIOS = ('nome', 'cpf_associado', 'data_reserva', 'horario_inicio', 'horario_fim')
+
+
+@lru_cache(maxsize=4096)
+def _validar_email(email: str) -> Tuple[bool, str]:
+    """Valida formato de email (resultado memorizado por email)"""
+    if not _EMAIL_RE.match(email):
+        return False, "Formato de email inválido"
+    
+    return True, "Email válido"
+
+
 class ValidadorReserva(IValidadorReserva):
     """Validador concreto para reservas"""
     
     def __init__(self, config: Optional[Config] = None):
         self.config = config or Config()
+        # Limites de duração em minutos inteiros (sem aritmética de ponto flutuante)
+        self._duracao_minima_min = self.config.MIN_DURATION_HOURS * 60
+        self._duracao_maxima_min = self.config.MAX_DURATION_HOURS * 60
     
     def validar_dados_reserva(self, dados: Dict) -> Tuple[bool, str]:
         """Valida todos os dados de uma reserva"""
         
-        # Validar campos obrigatórios - incluindo CPF para SINT-IFESGO
-        campos_obrigatorios = ['nome', 'cpf_associado', 'data_reserva', 'horario_inicio', 'horario_fim']
-        for campo in campos_obrigatorios:
+        # Validar campos obrigatórios
+        for campo in _CAMPOS_OBRIGATORIOS:
             if not dados.get(campo):
                 return False, f"Campo obrigatório não preenchido: {campo}"
         
@@ -49,29 +75,26 @@ class ValidadorReserva(IValidadorReserva):
     
     def validar_horario_funcionamento(self, inicio: time, fim: time) -> Tuple[bool, str]:
         """Valida se o horário está dentro do funcionamento"""
-        horario_inicio_func = time(8, 0)  # 08:00
-        horario_fim_func = time(18, 0)    # 18:00 - Atualizado para SINT-IFESGO
-        
-        if inicio < horario_inicio_func or fim > horario_fim_func:
+        if inicio < _ABERTURA or fim > _FECHAMENTO:
             return False, "Horário de funcionamento: 08:00 às 18:00"
         
         if inicio >= fim:
             return False, "Horário de início deve ser anterior ao horário de fim"
         
         # Validar duração mínima e máxima
-        duracao_horas = (fim.hour + fim.minute/60) - (inicio.hour + inicio.minute/60)
+        duracao_min = (fim.hour * 60 + fim.minute) - (inicio.hour * 60 + inicio.minute)
         
-        if duracao_horas < self.config.MIN_DURATION_HOURS:
+        if duracao_min < self._duracao_minima_min:
             return False, f"Duração mínima: {self.config.MIN_DURATION_HOURS} horas"
         
-        if duracao_horas > self.config.MAX_DURATION_HOURS:
+        if duracao_min > self._duracao_maxima_min:
             return False, f"Duração máxima: {self.config.MAX_DURATION_HOURS} horas"
         
         return True, "Horário válido"
     
     def validar_antecedencia(self, data_reserva: date) -> Tuple[bool, str]:
         """Valida a antecedência da reserva"""
-        hoje = date.today()
+        hoje = relogio.hoje()
         
         # Não pode ser data passada
         if data_reserva < hoje:
@@ -90,25 +113,22 @@ class ValidadorReserva(IValidadorReserva):
     
     def _validar_nome(self, nome: str) -> Tuple[bool, str]:
         """Valida o nome do responsável"""
-        if not nome or len(nome.strip()) < 2:
+        nome = nome.strip() if nome else ''
+        if len(nome) < 2:
             return False, "Nome deve ter pelo menos 2 caracteres"
         
-        if len(nome.strip()) > 100:
+        if len(nome) > 100:
             return False, "Nome deve ter no máximo 100 caracteres"
         
         # Verificar se contém apenas letras, espaços e acentos
-        if not re.match(r'^[a-zA-ZÀ-ÿ\s]+$', nome.strip()):
+        if not _NOME_RE.match(nome):
             return False, "Nome deve conter apenas letras e espaços"
         
         return True, "Nome válido"
     
     def _validar_email(self, email: str) -> Tuple[bool, str]:
         """Valida formato de email"""
-        padrao = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        if not re.match(padrao, email):
-            return False, "Formato de email inválido"
-        
-        return True, "Email válido"
+        return _validar_email(email)
     
 
     
@@ -126,32 +146,5 @@ class ValidadorReserva(IValidadorReserva):
     
     def _validar_cpf(self, cpf: str) -> Tuple[bool, str]:
         """Valida CPF usando algoritmo oficial"""
-        cpf = re.sub(r'[^\d]', '', cpf)
-        
-        if len(cpf) != 11:
-            return False, "CPF deve ter 11 dígitos"
-        
-        # CPFs inválidos conhecidos
-        if cpf in ['00000000000', '11111111111', '22222222222', 
-                   '33333333333', '44444444444', '55555555555',
-                   '66666666666', '77777777777', '88888888888',
-                   '99999999999']:
-            return False, "CPF inválido"
-        
-        # Validação do primeiro dígito
-        soma = sum(int(cpf[i]) * (10 - i) for i in range(9))
-        resto = soma % 11
-        digito1 = 0 if resto < 2 else 11 - resto
-        
-        if int(cpf[9]) != digito1:
-            return False, "CPF inválido"
-        
-        # Validação do segundo dígito
-        soma = sum(int(cpf[i]) * (11 - i) for i in range(10))
-        resto = soma % 11
-        digito2 = 0 if resto < 2 else 11 - resto
-        
-        if int(cpf[10]) != digito2:
-            return False, "CPF inválido"
-        
-        return True, "CPF válido"
\ No newline at end of file
+        # Mesmo cálculo (memorizado por CPF) da entidade de associado
+        return Associado.validar_cpf(cpf)
\ No newline at end of file
@@ -50,6 +50,42 @@ class Config:
     # Desabilitar rastreamento de modificações (economia de memória)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Pool de conexões reaproveitado entre requisições (evita abrir/fechar
+    # uma conexão por requisição sob servidores com várias threads)
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': 10,
+        'max_overflow': 20,
+        'pool_pre_ping': True,   # Descarta conexões mortas antes do uso
+        'pool_recycle': 300,     # Renova conexões a cada 5 minutos
+        # Cache de SQL compilado (padrão 500 entradas): consultas repetidas
+        # por requisição reaproveitam a compilação em vez de refazê-la
+        'query_cache_size': 1200
+    }
+    
+    if SQLALCHEMY_DATABASE_URI.startswith('sqlite'):
+        # SQLite: permitir que a conexão do pool seja usada por outra thread
+        SQLALCHEMY_ENGINE_OPTIONS['connect_args'] = {'check_same_thread': False}
+        if SQLALCHEMY_DATABASE_URI in ('sqlite://', 'sqlite:///:memory:'):
+            # Banco em memória usa StaticPool (conexão única), sem tamanho de pool
+            del SQLALCHEMY_ENGINE_OPTIONS['pool_size']
+            del SQLALCHEMY_ENGINE_OPTIONS['max_overflow']
+    
+    # =========================================================================
+    # COMPRESSÃO DAS RESPOSTAS
+    # =========================================================================
+    
+    # Respostas destes tipos, a partir do tamanho mínimo (bytes), são
+    # enviadas com gzip quando o navegador aceita. Arquivos estáticos (CSS,
+    # JS) saem por direct_passthrough e não passam pela compressão: ficam a
+    # cargo do servidor web na produção
+    COMPRESS_MIMETYPES = {'application/json', 'text/html'}
+    COMPRESS_MIN_SIZE = 500
+    COMPRESS_LEVEL = 6
+    
+    # Em modo debug, registra um aviso quando uma requisição executa mais
+    # consultas SQL que este limite (sinal de carregamento lazy / N+1)
+    SQL_ALERTA_CONSULTAS_POR_REQUISICAO = 15
+    
     # =========================================================================
     # CONFIGURAÇÕES DE HORÁRIO DE FUNCIONAMENTO
     # =========================================================================